@@ -1,23 +1,50 @@
 """
 Aplicação principal FastAPI
 """
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 
 # Importar routers
 from api.routers import clinico, exames, opme, ingestao
-from api.services.rabbitmq_producer import producer
-from shared.config import API_HOST, API_PORT
+from api.services import batch_publisher
+from api.services.async_producer import producer
+from shared.config import API_HOST, API_PORT, API_WORKERS, API_RELOAD
 from shared.utils import setup_logger
 
 # Configuração de logging
 logger = setup_logger("api_main")
 
+# Ciclo de vida da aplicação (substitui os hooks on_event, depreciados)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Conecta ao RabbitMQ no startup e encerra tudo no shutdown"""
+    logger.info("Iniciando a API...")
+
+    # Conectar a todos os vhosts na inicialização; as conexões são
+    # RobustConnection e se reconectam sozinhas se o broker reiniciar
+    try:
+        await producer.connect_all()
+    except Exception as e:
+        logger.error(f"Erro ao conectar ao RabbitMQ: {e}")
+        logger.warning("A API continuará funcionando, mas pode ter problemas ao enviar mensagens")
+
+    # Iniciar as corrotinas de drenagem do publicador em lote
+    batch_publisher.start()
+
+    yield
+
+    logger.info("Encerrando a API...")
+    await batch_publisher.stop()
+    await producer.close()
+
 # Criar aplicação FastAPI
 app = FastAPI(
     title="Banquete API",
     description="API para processamento de tarefas com CrewAI via RabbitMQ",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configurar CORS
@@ -56,30 +83,19 @@ async def ready():
     """Endpoint de prontidão da API"""
     return {"status": "ready"}
 
-# Eventos do ciclo de vida da aplicação
-@app.on_event("startup")
-async def startup_event():
-    """Executado quando a aplicação FastAPI inicia"""
-    # Conectar ao RabbitMQ quando a aplicação iniciar
-    logger.info("Iniciando a API...")
-    
-    # Pré-conectar aos vhosts mais usados para melhor performance
-    try:
-        producer.connect("fluxo_clinico")
-        producer.connect("fluxo_exames")
-    except Exception as e:
-        logger.error(f"Erro ao conectar ao RabbitMQ: {e}")
-        logger.warning("A API continuará funcionando, mas pode ter problemas ao enviar mensagens")
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Executado quando a aplicação FastAPI é encerrada"""
-    # Fechar conexão com RabbitMQ quando a aplicação encerrar
-    logger.info("Encerrando a API...")
-    producer.close()
-
 if __name__ == "__main__":
     import uvicorn
-    # Iniciar aplicação para testes
     logger.info(f"Iniciando servidor na porta {API_PORT}...")
-    uvicorn.run("api.main:app", host=API_HOST, port=API_PORT, reload=True)
\ No newline at end of file
+    # uvloop + httptools trocam o event loop e o parser HTTP puros-Python
+    # por implementações em C; access_log desligado evita um format() de
+    # logging por requisição. Recarga automática só via API_RELOAD=true
+    uvicorn.run(
+        "api.main:app",
+        host=API_HOST,
+        port=API_PORT,
+        loop="uvloop",
+        http="httptools",
+        workers=1 if API_RELOAD else API_WORKERS,
+        reload=API_RELOAD,
+        access_log=False
+    )
\ No newline at end of file
@@ -5,12 +5,21 @@ from pydantic import BaseModel, Field
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 from enum import Enum
-import uuid
+
+from shared.utils import generate_task_id
 
 # Classes base
 class BaseTask(BaseModel):
-    """Modelo base para todas as tarefas"""
-    id: Optional[str] = Field(default_factory=lambda: str(uuid.uuid4()))
+    """
+    Modelo base para todas as tarefas
+
+    O timestamp é sempre preenchido pelo default_factory na validação,
+    então os produtores não precisam (nem devem) adicioná-lo de novo.
+    """
+    # Referências diretas de função: o validador chama o callable sem o
+    # frame extra de um lambda. datetime.now (naïve local) é a convenção
+    # de timestamp de todo o pipeline, a mesma de timestamp_now()
+    id: Optional[str] = Field(default_factory=generate_task_id)
     prioridade: Optional[int] = 0
     timestamp: Optional[datetime] = Field(default_factory=datetime.now)
 
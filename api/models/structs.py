@@ -0,0 +1,125 @@
+"""
+Modelos msgspec para decodificação rápida do corpo das requisições
+
+Os Structs abaixo espelham os modelos Pydantic de api/models/schemas.py
+para os POSTs mais quentes: msgspec decodifica o JSON do corpo direto em
+objetos tipados, com decoder especializado em C e sem dict intermediário.
+Os modelos Pydantic continuam sendo usados para respostas, enums e
+endpoints de payload livre.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import msgspec
+from fastapi import HTTPException, Request
+
+from api.models.schemas import FormatoIngestao, TipoConsulta
+from shared.utils import generate_task_id
+
+
+class Paciente(msgspec.Struct):
+    """Struct para representar um paciente"""
+    id: int
+    nome: str
+    idade: Optional[int] = None
+    genero: Optional[str] = None
+
+
+class Medico(msgspec.Struct):
+    """Struct para representar um médico"""
+    id: int
+    nome: str
+    especialidade: Optional[str] = None
+    crm: Optional[str] = None
+
+
+class ItemOPME(msgspec.Struct):
+    """Item de OPME (órtese, prótese, materiais especiais)"""
+    codigo: str
+    descricao: str
+    quantidade: int = 1
+
+
+class ConsultaTask(msgspec.Struct, kw_only=True):
+    """Tarefa de consulta médica"""
+    paciente: Paciente
+    medico: Medico
+    data: datetime
+    tipo_consulta: TipoConsulta
+    observacoes: Optional[str] = None
+    tipo: str = "consulta"
+    id: Optional[str] = msgspec.field(default_factory=generate_task_id)
+    prioridade: Optional[int] = 0
+    timestamp: Optional[datetime] = msgspec.field(default_factory=datetime.now)
+
+
+class ExameTask(msgspec.Struct, kw_only=True):
+    """Tarefa de exame médico"""
+    paciente: Paciente
+    solicitante: Medico
+    tipo: str = "hemograma"
+    data_solicitacao: Optional[datetime] = msgspec.field(default_factory=datetime.now)
+    urgente: bool = False
+    observacoes: Optional[str] = None
+    id: Optional[str] = msgspec.field(default_factory=generate_task_id)
+    prioridade: Optional[int] = 0
+    timestamp: Optional[datetime] = msgspec.field(default_factory=datetime.now)
+
+
+class OPMETask(msgspec.Struct, kw_only=True):
+    """Tarefa de OPME"""
+    paciente: Paciente
+    cirurgiao: Medico
+    procedimento: str
+    data_cirurgia: datetime
+    itens: List[ItemOPME]
+    tipo: str = "protese"
+    id: Optional[str] = msgspec.field(default_factory=generate_task_id)
+    prioridade: Optional[int] = 0
+    timestamp: Optional[datetime] = msgspec.field(default_factory=datetime.now)
+
+
+class IngestaoTask(msgspec.Struct, kw_only=True):
+    """Tarefa de ingestão de dados"""
+    origem: str
+    formato: FormatoIngestao
+    tipo: str = "carga_pacientes"
+    quantidade_registros: Optional[int] = None
+    metadados: Optional[Dict[str, Any]] = None
+    id: Optional[str] = msgspec.field(default_factory=generate_task_id)
+    prioridade: Optional[int] = 0
+    timestamp: Optional[datetime] = msgspec.field(default_factory=datetime.now)
+
+
+def msgspec_body(struct_type):
+    """
+    Cria uma dependência FastAPI que decodifica o corpo com msgspec
+
+    Args:
+        struct_type: Tipo do Struct esperado no corpo da requisição
+
+    Returns:
+        Corrotina de dependência que devolve a instância decodificada
+    """
+    decoder = msgspec.json.Decoder(struct_type)
+
+    async def _decode(request: Request):
+        try:
+            return decoder.decode(await request.body())
+        except (msgspec.ValidationError, msgspec.DecodeError) as e:
+            raise HTTPException(status_code=422, detail=str(e))
+
+    return _decode
+
+
+def as_task_data(task) -> Dict[str, Any]:
+    """
+    Converte um Struct em dict pronto para publicação na fila
+
+    Args:
+        task: Instância de um dos Structs de tarefa
+
+    Returns:
+        Dict[str, Any]: Dados da tarefa com tipos compatíveis com JSON
+    """
+    return msgspec.to_builtins(task)
@@ -1,13 +1,19 @@
 """
 Router para o fluxo clínico na API
 """
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
+from fastapi import APIRouter, HTTPException, Depends
 from typing import Dict, Any
 
-from api.models.schemas import ConsultaTask, TaskResponse, StatusResponse
-from api.services.rabbitmq_producer import producer
+from api.models.schemas import TaskResponse, StatusResponse
+from api.models.structs import ConsultaTask, as_task_data, msgspec_body
+from api.services import batch_publisher
+from datetime import datetime
+
 from shared.utils import setup_logger, generate_task_id
 
+# Referência ligada uma única vez: evita a busca de atributo por requisição
+_now = datetime.now
+
 # Configuração de logging
 logger = setup_logger("api_router_clinico")
 
@@ -20,33 +26,21 @@ router = APIRouter(
 
 @router.post("/consulta/", response_model=TaskResponse, status_code=202)
 async def criar_consulta(
-    consulta: ConsultaTask, 
-    background_tasks: BackgroundTasks
+    consulta: ConsultaTask = Depends(msgspec_body(ConsultaTask))
 ):
     """
     Cria uma nova tarefa de consulta médica no fluxo clínico
     """
     # Preparar dados da tarefa
-    task_data = consulta.dict()
-    
-    # Enviar tarefa para a fila (em background para não bloquear a resposta)
-    def send_to_queue():
-        message_id = producer.send_task(task_data, vhost="fluxo_clinico")
-        if not message_id:
-            logger.error(f"Falha ao enviar tarefa {task_data['id']} para a fila")
+    # Converter o Struct decodificado em dict pronto para JSON
+    task_data = as_task_data(consulta)
     
-    background_tasks.add_task(send_to_queue)
-    
-    return {
-        "message": "Consulta enviada para processamento",
-        "task_id": task_data["id"],
-        "status": "pending"
-    }
+    # Enfileirar a tarefa e responder 202 imediatamente
+    return await batch_publisher.submit("fluxo_clinico", task_data, "Consulta enviada para processamento")
 
 @router.post("/internacao/", response_model=TaskResponse, status_code=202)
 async def criar_internacao(
-    dados: Dict[str, Any],
-    background_tasks: BackgroundTasks
+    dados: Dict[str, Any]
 ):
     """
     Cria uma nova tarefa de internação no fluxo clínico
@@ -59,27 +53,16 @@ async def criar_internacao(
         "id": task_id,
         "tipo": "internacao",
         "dados": dados,
-        "prioridade": dados.get("urgente", False) and 1 or 0
+        "prioridade": 1 if dados.get("urgente") else 0,
+        "timestamp": _now().isoformat()
     }
     
-    # Enviar tarefa para a fila
-    def send_to_queue():
-        message_id = producer.send_task(task_data, vhost="fluxo_clinico")
-        if not message_id:
-            logger.error(f"Falha ao enviar tarefa {task_id} para a fila")
-    
-    background_tasks.add_task(send_to_queue)
-    
-    return {
-        "message": "Internação enviada para processamento",
-        "task_id": task_id,
-        "status": "pending"
-    }
+    # Enfileirar a tarefa e responder 202 imediatamente
+    return await batch_publisher.submit("fluxo_clinico", task_data, "Internação enviada para processamento")
 
 @router.post("/alta/", response_model=TaskResponse, status_code=202)
 async def criar_alta(
-    dados: Dict[str, Any],
-    background_tasks: BackgroundTasks
+    dados: Dict[str, Any]
 ):
     """
     Cria uma nova tarefa de alta hospitalar no fluxo clínico
@@ -91,22 +74,12 @@ async def criar_alta(
     task_data = {
         "id": task_id,
         "tipo": "alta",
-        "dados": dados
+        "dados": dados,
+        "timestamp": _now().isoformat()
     }
     
-    # Enviar tarefa para a fila
-    def send_to_queue():
-        message_id = producer.send_task(task_data, vhost="fluxo_clinico")
-        if not message_id:
-            logger.error(f"Falha ao enviar tarefa {task_id} para a fila")
-    
-    background_tasks.add_task(send_to_queue)
-    
-    return {
-        "message": "Alta enviada para processamento",
-        "task_id": task_id,
-        "status": "pending"
-    }
+    # Enfileirar a tarefa e responder 202 imediatamente
+    return await batch_publisher.submit("fluxo_clinico", task_data, "Alta enviada para processamento")
 
 @router.get("/status/{task_id}", response_model=StatusResponse)
 async def verificar_status(task_id: str):
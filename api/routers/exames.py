@@ -1,16 +1,35 @@
 """
 Router para o fluxo de exames na API
 """
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
+from fastapi import APIRouter, HTTPException, Depends
 from typing import Dict, Any, List
 
-from api.models.schemas import ExameTask, TaskResponse, StatusResponse, TipoExame
-from api.services.rabbitmq_producer import producer
+from api.models.schemas import TaskResponse, StatusResponse, TipoExame
+from api.models.structs import ExameTask, as_task_data, msgspec_body
+from api.services import batch_publisher
+from datetime import datetime
+
 from shared.utils import setup_logger, generate_task_id
 
+# Referência ligada uma única vez: evita a busca de atributo por requisição
+_now = datetime.now
+
 # Configuração de logging
 logger = setup_logger("api_router_exames")
 
+# Pré-computados no import: membership O(1) e lista pronta de /tipos/.
+# A tupla ordenada vem primeiro (a mensagem de erro 400 lista os tipos
+# sempre na mesma ordem) e o frozenset deriva dela
+_EXAMES_IMAGEM_TIPOS = (
+    TipoExame.RAIO_X,
+    TipoExame.TOMOGRAFIA,
+    TipoExame.ULTRASSONOGRAFIA,
+    TipoExame.RESSONANCIA
+)
+_EXAMES_IMAGEM = frozenset(_EXAMES_IMAGEM_TIPOS)
+_EXAMES_IMAGEM_VALUES = tuple(e.value for e in _EXAMES_IMAGEM_TIPOS)
+_TIPO_EXAME_VALUES = tuple(e.value for e in TipoExame)
+
 # Criar router
 router = APIRouter(
     prefix="/api/exames",
@@ -20,33 +39,21 @@ router = APIRouter(
 
 @router.post("/", response_model=TaskResponse, status_code=202)
 async def criar_exame(
-    exame: ExameTask, 
-    background_tasks: BackgroundTasks
+    exame: ExameTask = Depends(msgspec_body(ExameTask))
 ):
     """
     Cria uma nova tarefa de exame médico
     """
     # Preparar dados da tarefa
-    task_data = exame.dict()
-    
-    # Enviar tarefa para a fila (em background para não bloquear a resposta)
-    def send_to_queue():
-        message_id = producer.send_task(task_data, vhost="fluxo_exames")
-        if not message_id:
-            logger.error(f"Falha ao enviar tarefa {task_data['id']} para a fila")
+    # Converter o Struct decodificado em dict pronto para JSON
+    task_data = as_task_data(exame)
     
-    background_tasks.add_task(send_to_queue)
-    
-    return {
-        "message": f"Exame de {exame.tipo} enviado para processamento",
-        "task_id": task_data["id"],
-        "status": "pending"
-    }
+    # Enfileirar a tarefa e responder 202 imediatamente
+    return await batch_publisher.submit("fluxo_exames", task_data, f"Exame de {exame.tipo} enviado para processamento")
 
 @router.post("/hemograma/", response_model=TaskResponse, status_code=202)
 async def criar_hemograma(
-    dados: Dict[str, Any],
-    background_tasks: BackgroundTasks
+    dados: Dict[str, Any]
 ):
     """
     Cria uma nova tarefa específica de hemograma
@@ -59,45 +66,27 @@ async def criar_hemograma(
         "id": task_id,
         "tipo": "hemograma",
         "dados": dados,
-        "prioridade": dados.get("urgente", False) and 1 or 0
+        "prioridade": 1 if dados.get("urgente") else 0,
+        "timestamp": _now().isoformat()
     }
     
-    # Enviar tarefa para a fila
-    def send_to_queue():
-        message_id = producer.send_task(task_data, vhost="fluxo_exames")
-        if not message_id:
-            logger.error(f"Falha ao enviar tarefa {task_id} para a fila")
-    
-    background_tasks.add_task(send_to_queue)
-    
-    return {
-        "message": "Hemograma enviado para processamento",
-        "task_id": task_id,
-        "status": "pending"
-    }
+    # Enfileirar a tarefa e responder 202 imediatamente
+    return await batch_publisher.submit("fluxo_exames", task_data, "Hemograma enviado para processamento")
 
 @router.post("/imagem/{tipo_exame}", response_model=TaskResponse, status_code=202)
 async def criar_exame_imagem(
     tipo_exame: TipoExame,
-    dados: Dict[str, Any],
-    background_tasks: BackgroundTasks
+    dados: Dict[str, Any]
 ):
     """
     Cria uma nova tarefa de exame de imagem 
     (raio_x, tomografia, ultrassonografia, ressonancia)
     """
     # Validar tipo de exame (deve ser um exame de imagem)
-    exames_imagem = [
-        TipoExame.RAIO_X, 
-        TipoExame.TOMOGRAFIA, 
-        TipoExame.ULTRASSONOGRAFIA, 
-        TipoExame.RESSONANCIA
-    ]
-    
-    if tipo_exame not in exames_imagem:
+    if tipo_exame not in _EXAMES_IMAGEM:
         raise HTTPException(
             status_code=400, 
-            detail=f"Tipo de exame inválido. Deve ser um dos seguintes: {[e.value for e in exames_imagem]}"
+            detail=f"Tipo de exame inválido. Deve ser um dos seguintes: {list(_EXAMES_IMAGEM_VALUES)}"
         )
     
     # Gerar ID único para a tarefa
@@ -108,29 +97,19 @@ async def criar_exame_imagem(
         "id": task_id,
         "tipo": tipo_exame.value,
         "dados": dados,
-        "prioridade": dados.get("urgente", False) and 1 or 0
+        "prioridade": 1 if dados.get("urgente") else 0,
+        "timestamp": _now().isoformat()
     }
     
-    # Enviar tarefa para a fila
-    def send_to_queue():
-        message_id = producer.send_task(task_data, vhost="fluxo_exames")
-        if not message_id:
-            logger.error(f"Falha ao enviar tarefa {task_id} para a fila")
-    
-    background_tasks.add_task(send_to_queue)
-    
-    return {
-        "message": f"Exame de {tipo_exame.value} enviado para processamento",
-        "task_id": task_id,
-        "status": "pending"
-    }
+    # Enfileirar a tarefa e responder 202 imediatamente
+    return await batch_publisher.submit("fluxo_exames", task_data, f"Exame de {tipo_exame.value} enviado para processamento")
 
 @router.get("/tipos/", response_model=List[str])
 async def listar_tipos_exame():
     """
     Lista todos os tipos de exame disponíveis
     """
-    return [tipo.value for tipo in TipoExame]
+    return _TIPO_EXAME_VALUES
 
 @router.get("/status/{task_id}", response_model=StatusResponse)
 async def verificar_status(task_id: str):
@@ -1,16 +1,26 @@
 """
 Router para o fluxo de ingestão de dados na API
 """
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
+from fastapi import APIRouter, HTTPException, Depends
 from typing import Dict, Any, List
 
-from api.models.schemas import IngestaoTask, FormatoIngestao, TaskResponse, StatusResponse
-from api.services.rabbitmq_producer import producer
+from api.models.schemas import FormatoIngestao, TaskResponse, StatusResponse
+from api.models.structs import IngestaoTask, as_task_data, msgspec_body
+from api.services import batch_publisher
+from datetime import datetime
+
 from shared.utils import setup_logger, generate_task_id
 
+# Referência ligada uma única vez: evita a busca de atributo por requisição
+_now = datetime.now
+
 # Configuração de logging
 logger = setup_logger("api_router_ingestao")
 
+# Pré-computados no import: membership O(1) e lista pronta de /formatos/
+_FORMATO_VALUES = tuple(f.value for f in FormatoIngestao)
+_FORMATOS_SET = frozenset(_FORMATO_VALUES)
+
 # Criar router
 router = APIRouter(
     prefix="/api/ingestao",
@@ -20,43 +30,31 @@ router = APIRouter(
 
 @router.post("/", response_model=TaskResponse, status_code=202)
 async def criar_ingestao(
-    ingestao: IngestaoTask, 
-    background_tasks: BackgroundTasks
+    ingestao: IngestaoTask = Depends(msgspec_body(IngestaoTask))
 ):
     """
     Cria uma nova tarefa de ingestão de dados
     """
     # Preparar dados da tarefa
-    task_data = ingestao.dict()
-    
-    # Enviar tarefa para a fila (em background para não bloquear a resposta)
-    def send_to_queue():
-        message_id = producer.send_task(task_data, vhost="ingestao_dados")
-        if not message_id:
-            logger.error(f"Falha ao enviar tarefa {task_data['id']} para a fila")
-    
-    background_tasks.add_task(send_to_queue)
+    # Converter o Struct decodificado em dict pronto para JSON
+    task_data = as_task_data(ingestao)
     
-    return {
-        "message": f"Ingestão de dados ({ingestao.tipo}) enviada para processamento",
-        "task_id": task_data["id"],
-        "status": "pending"
-    }
+    # Enfileirar a tarefa e responder 202 imediatamente
+    return await batch_publisher.submit("ingestao_dados", task_data, f"Ingestão de dados ({ingestao.tipo}) enviada para processamento")
 
 @router.post("/pacientes/", response_model=TaskResponse, status_code=202)
 async def criar_ingestao_pacientes(
-    dados: Dict[str, Any],
-    background_tasks: BackgroundTasks
+    dados: Dict[str, Any]
 ):
     """
     Cria uma nova tarefa de ingestão de dados de pacientes
     """
     # Validar formato
     formato = dados.get("formato")
-    if formato and formato not in [f.value for f in FormatoIngestao]:
+    if formato and formato not in _FORMATOS_SET:
         raise HTTPException(
             status_code=400, 
-            detail=f"Formato inválido. Deve ser um dos seguintes: {[f.value for f in FormatoIngestao]}"
+            detail=f"Formato inválido. Deve ser um dos seguintes: {list(_FORMATO_VALUES)}"
         )
     
     # Gerar ID único para a tarefa
@@ -69,27 +67,16 @@ async def criar_ingestao_pacientes(
         "origem": dados.get("origem", "sistema_externo"),
         "formato": dados.get("formato", "csv"),
         "quantidade_registros": dados.get("quantidade_registros"),
-        "metadados": dados.get("metadados")
+        "metadados": dados.get("metadados"),
+        "timestamp": _now().isoformat()
     }
     
-    # Enviar tarefa para a fila
-    def send_to_queue():
-        message_id = producer.send_task(task_data, vhost="ingestao_dados")
-        if not message_id:
-            logger.error(f"Falha ao enviar tarefa {task_id} para a fila")
-    
-    background_tasks.add_task(send_to_queue)
-    
-    return {
-        "message": "Ingestão de dados de pacientes enviada para processamento",
-        "task_id": task_id,
-        "status": "pending"
-    }
+    # Enfileirar a tarefa e responder 202 imediatamente
+    return await batch_publisher.submit("ingestao_dados", task_data, "Ingestão de dados de pacientes enviada para processamento")
 
 @router.post("/medicos/", response_model=TaskResponse, status_code=202)
 async def criar_ingestao_medicos(
-    dados: Dict[str, Any],
-    background_tasks: BackgroundTasks
+    dados: Dict[str, Any]
 ):
     """
     Cria uma nova tarefa de ingestão de dados de médicos
@@ -104,29 +91,19 @@ async def criar_ingestao_medicos(
         "origem": dados.get("origem", "sistema_externo"),
         "formato": dados.get("formato", "csv"),
         "quantidade_registros": dados.get("quantidade_registros"),
-        "metadados": dados.get("metadados")
+        "metadados": dados.get("metadados"),
+        "timestamp": _now().isoformat()
     }
     
-    # Enviar tarefa para a fila
-    def send_to_queue():
-        message_id = producer.send_task(task_data, vhost="ingestao_dados")
-        if not message_id:
-            logger.error(f"Falha ao enviar tarefa {task_id} para a fila")
-    
-    background_tasks.add_task(send_to_queue)
-    
-    return {
-        "message": "Ingestão de dados de médicos enviada para processamento",
-        "task_id": task_id,
-        "status": "pending"
-    }
+    # Enfileirar a tarefa e responder 202 imediatamente
+    return await batch_publisher.submit("ingestao_dados", task_data, "Ingestão de dados de médicos enviada para processamento")
 
 @router.get("/formatos/", response_model=List[str])
 async def listar_formatos():
     """
     Lista todos os formatos de arquivo suportados para ingestão
     """
-    return [formato.value for formato in FormatoIngestao]
+    return _FORMATO_VALUES
 
 @router.get("/status/{task_id}", response_model=StatusResponse)
 async def verificar_status(task_id: str):
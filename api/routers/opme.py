@@ -1,13 +1,19 @@
 """
 Router para o fluxo OPME (Órteses, Próteses e Materiais Especiais) na API
 """
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
+from fastapi import APIRouter, HTTPException, Depends
 from typing import Dict, Any, List
 
-from api.models.schemas import OPMETask, TaskResponse, StatusResponse
-from api.services.rabbitmq_producer import producer
+from api.models.schemas import TaskResponse, StatusResponse
+from api.models.structs import OPMETask, as_task_data, msgspec_body
+from api.services import batch_publisher
+from datetime import datetime
+
 from shared.utils import setup_logger, generate_task_id
 
+# Referência ligada uma única vez: evita a busca de atributo por requisição
+_now = datetime.now
+
 # Configuração de logging
 logger = setup_logger("api_router_opme")
 
@@ -20,33 +26,21 @@ router = APIRouter(
 
 @router.post("/", response_model=TaskResponse, status_code=202)
 async def criar_opme(
-    opme: OPMETask, 
-    background_tasks: BackgroundTasks
+    opme: OPMETask = Depends(msgspec_body(OPMETask))
 ):
     """
     Cria uma nova tarefa de OPME
     """
     # Preparar dados da tarefa
-    task_data = opme.dict()
-    
-    # Enviar tarefa para a fila (em background para não bloquear a resposta)
-    def send_to_queue():
-        message_id = producer.send_task(task_data, vhost="fluxo_opme")
-        if not message_id:
-            logger.error(f"Falha ao enviar tarefa {task_data['id']} para a fila")
-    
-    background_tasks.add_task(send_to_queue)
+    # Converter o Struct decodificado em dict pronto para JSON
+    task_data = as_task_data(opme)
     
-    return {
-        "message": f"Solicitação de {opme.tipo} enviada para processamento",
-        "task_id": task_data["id"],
-        "status": "pending"
-    }
+    # Enfileirar a tarefa e responder 202 imediatamente
+    return await batch_publisher.submit("fluxo_opme", task_data, f"Solicitação de {opme.tipo} enviada para processamento")
 
 @router.post("/protese/", response_model=TaskResponse, status_code=202)
 async def criar_protese(
-    dados: Dict[str, Any],
-    background_tasks: BackgroundTasks
+    dados: Dict[str, Any]
 ):
     """
     Cria uma nova tarefa específica de prótese
@@ -59,27 +53,16 @@ async def criar_protese(
         "id": task_id,
         "tipo": "protese",
         "dados": dados,
-        "prioridade": dados.get("urgencia", False) and 1 or 0
+        "prioridade": 1 if dados.get("urgencia") else 0,
+        "timestamp": _now().isoformat()
     }
     
-    # Enviar tarefa para a fila
-    def send_to_queue():
-        message_id = producer.send_task(task_data, vhost="fluxo_opme")
-        if not message_id:
-            logger.error(f"Falha ao enviar tarefa {task_id} para a fila")
-    
-    background_tasks.add_task(send_to_queue)
-    
-    return {
-        "message": "Solicitação de prótese enviada para processamento",
-        "task_id": task_id,
-        "status": "pending"
-    }
+    # Enfileirar a tarefa e responder 202 imediatamente
+    return await batch_publisher.submit("fluxo_opme", task_data, "Solicitação de prótese enviada para processamento")
 
 @router.post("/material/", response_model=TaskResponse, status_code=202)
 async def criar_material(
-    dados: Dict[str, Any],
-    background_tasks: BackgroundTasks
+    dados: Dict[str, Any]
 ):
     """
     Cria uma nova tarefa de material especial
@@ -92,22 +75,12 @@ async def criar_material(
         "id": task_id,
         "tipo": "material",
         "dados": dados,
-        "prioridade": dados.get("urgencia", False) and 1 or 0
+        "prioridade": 1 if dados.get("urgencia") else 0,
+        "timestamp": _now().isoformat()
     }
     
-    # Enviar tarefa para a fila
-    def send_to_queue():
-        message_id = producer.send_task(task_data, vhost="fluxo_opme")
-        if not message_id:
-            logger.error(f"Falha ao enviar tarefa {task_id} para a fila")
-    
-    background_tasks.add_task(send_to_queue)
-    
-    return {
-        "message": "Solicitação de material especial enviada para processamento",
-        "task_id": task_id,
-        "status": "pending"
-    }
+    # Enfileirar a tarefa e responder 202 imediatamente
+    return await batch_publisher.submit("fluxo_opme", task_data, "Solicitação de material especial enviada para processamento")
 
 @router.get("/status/{task_id}", response_model=StatusResponse)
 async def verificar_status(task_id: str):
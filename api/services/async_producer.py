@@ -0,0 +1,194 @@
+"""
+Produtor assíncrono (aio-pika) para publicação de mensagens a partir da API
+
+Mantém uma conexão por virtual host no próprio event loop do FastAPI, de
+forma que a publicação não bloqueia threads nem o loop: com
+publisher_confirms desligado, o publish resolve assim que o frame é
+escrito no socket.
+"""
+import asyncio
+from typing import Any, Dict, Optional
+
+import aio_pika
+import orjson
+
+from shared.config import (
+    RABBITMQ_HOST, RABBITMQ_PORT, RABBITMQ_USER, RABBITMQ_PASS,
+    QUEUE_NAME, VIRTUAL_HOSTS, VIRTUAL_HOSTS_SET, TASK_TYPE_TO_VHOST
+)
+from shared.utils import setup_logger, generate_task_id
+
+# Configuração de logging
+logger = setup_logger("async_producer")
+
+# Vhosts sensíveis a durabilidade: os canais publicam com confirms ligados
+# e o lote aguarda todas as confirmações de uma vez (ack cumulativo do
+# broker), em vez de uma ida e volta bloqueante por mensagem
+CONFIRM_DELIVERY_VHOSTS = frozenset({"fluxo_clinico"})
+
+
+class AsyncRabbitMQProducer:
+    """Produtor de mensagens sobre aio-pika, um canal por virtual host"""
+
+    def __init__(self):
+        self.connections: Dict[str, aio_pika.abc.AbstractConnection] = {}
+        self.channels: Dict[str, aio_pika.abc.AbstractChannel] = {}
+
+    async def connect(self, vhost: str):
+        """
+        Estabelece conexão e canal com o RabbitMQ para um virtual host
+
+        Args:
+            vhost: Virtual host para conectar
+        """
+        connection = self.connections.get(vhost)
+        if connection is not None and not connection.is_closed:
+            return
+
+        connection = await aio_pika.connect_robust(
+            host=RABBITMQ_HOST,
+            port=RABBITMQ_PORT,
+            login=RABBITMQ_USER,
+            password=RABBITMQ_PASS,
+            virtualhost=vhost,
+            heartbeat=60,
+            reconnect_interval=1,
+            timeout=10
+        )
+        # Confirms só nos vhosts sensíveis a durabilidade; nos demais o
+        # publish resolve ao escrever o frame, sem aguardar basic.ack
+        confirms = vhost in CONFIRM_DELIVERY_VHOSTS
+        channel = await connection.channel(publisher_confirms=confirms)
+
+        # Verificar a fila uma única vez, aqui no startup, para que nenhuma
+        # publicação pague declaração de fila inline (não declarar de fato:
+        # as Quorum Queues são criadas com políticas próprias no RabbitMQ)
+        try:
+            await channel.declare_queue(QUEUE_NAME, passive=True)
+            logger.info(f"Fila '{QUEUE_NAME}' encontrada no vhost '{vhost}'")
+        except Exception as e:
+            logger.warning(f"Erro ao verificar fila no vhost '{vhost}': {e}")
+            logger.warning("As Quorum Queues devem ser declaradas com políticas específicas no RabbitMQ")
+            # O declare_queue com erro fecha o canal; reabrir para publicar
+            channel = await connection.channel(publisher_confirms=confirms)
+
+        self.connections[vhost] = connection
+        self.channels[vhost] = channel
+        logger.info(f"Conectado ao RabbitMQ ({RABBITMQ_HOST}:{RABBITMQ_PORT}, vhost={vhost})")
+
+    async def connect_all(self):
+        """
+        Conecta a todos os virtual hosts configurados (chamado no startup)
+
+        Os handshakes TCP+AMQP dos quatro vhosts acontecem em paralelo,
+        então o startup paga uma ida e volta em vez de uma por vhost.
+        Uma falha em um vhost não aborta os demais: quem ficou de fora
+        é reconectado sob demanda pelo send_task_fast.
+        """
+        results = await asyncio.gather(
+            *(self.connect(vhost) for vhost in VIRTUAL_HOSTS),
+            return_exceptions=True
+        )
+        for vhost, result in zip(VIRTUAL_HOSTS, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Erro ao conectar ao vhost '{vhost}' no startup: {result}")
+
+    async def send_task(self, task_data: Dict[str, Any],
+                        vhost: Optional[str] = None) -> Optional[str]:
+        """
+        Publica uma tarefa na fila do RabbitMQ (caminho genérico)
+
+        Resolve o vhost a partir do tipo da tarefa quando não informado e
+        valida antes de delegar ao caminho rápido. Chamadores que já
+        conhecem o vhost (os routers) devem usar send_task_fast.
+
+        Args:
+            task_data: Dados da tarefa a ser enviada
+            vhost: Virtual host específico (detectado automaticamente se None)
+
+        Returns:
+            Optional[str]: ID da mensagem se enviada com sucesso, None caso contrário
+        """
+        # Determinar vhost baseado no tipo da tarefa se não especificado
+        if vhost is None:
+            task_type = task_data.get('tipo', '')
+            vhost = TASK_TYPE_TO_VHOST.get(task_type)
+
+            if not vhost:
+                logger.error(f"Tipo de tarefa '{task_type}' não mapeado para nenhum vhost")
+                return None
+
+        # Validar vhost
+        if vhost not in VIRTUAL_HOSTS_SET:
+            logger.error(f"Virtual host '{vhost}' não está na lista de vhosts válidos")
+            return None
+
+        return await self.send_task_fast(task_data, vhost)
+
+    async def send_task_fast(self, task_data: Dict[str, Any], vhost: str) -> Optional[str]:
+        """
+        Caminho rápido de publicação para vhost conhecido
+
+        Assume vhost válido: sem resolução por tipo nem checagem de
+        pertencimento. Se o canal do vhost não existir ou estiver fechado
+        (broker indisponível no startup), reconecta sob demanda.
+
+        Args:
+            task_data: Dados da tarefa a ser enviada
+            vhost: Virtual host de destino (já validado pelo chamador)
+
+        Returns:
+            Optional[str]: ID da mensagem se enviada com sucesso, None caso contrário
+        """
+        try:
+            # Adicionar ID à tarefa se não existir
+            if 'id' not in task_data:
+                task_data['id'] = generate_task_id()
+
+            # Gerar message_id
+            message_id = generate_task_id()
+
+            # Reconectar sob demanda se o startup falhou para este vhost
+            # (connect_robust cuida de quedas; aqui é o canal ausente/fechado)
+            channel = self.channels.get(vhost)
+            if channel is None or channel.is_closed:
+                await self.connect(vhost)
+                channel = self.channels[vhost]
+
+            # Publicar a mensagem no exchange padrão
+            await channel.default_exchange.publish(
+                aio_pika.Message(
+                    body=orjson.dumps(task_data, default=str),
+                    delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                    content_type='application/json',
+                    message_id=message_id
+                ),
+                routing_key=QUEUE_NAME
+            )
+
+            logger.info(f"Tarefa enviada para a fila '{QUEUE_NAME}' no vhost '{vhost}'. "
+                        f"ID da tarefa: {task_data['id']}, Message ID: {message_id}")
+            return message_id
+
+        except Exception as e:
+            logger.error(f"Erro ao enviar tarefa para a fila: {e}")
+            return None
+
+    async def close(self, vhost: Optional[str] = None):
+        """
+        Fecha a conexão com o RabbitMQ
+
+        Args:
+            vhost: Virtual host específico para fechar (ou todos se None)
+        """
+        vhosts = [vhost] if vhost else list(self.connections)
+        for vh in vhosts:
+            connection = self.connections.pop(vh, None)
+            self.channels.pop(vh, None)
+            if connection is not None and not connection.is_closed:
+                await connection.close()
+                logger.info(f"Conexão com RabbitMQ fechada para vhost '{vh}'")
+
+
+# Instância singleton para ser importada pelo FastAPI
+producer = AsyncRabbitMQProducer()
@@ -0,0 +1,170 @@
+"""
+Publicador em lote para envio de mensagens ao RabbitMQ a partir da API
+
+Em vez de publicar uma mensagem por requisição HTTP via BackgroundTasks,
+as tarefas são enfileiradas em uma asyncio.Queue por virtual host e uma
+corrotina de drenagem publica vários itens de uma vez, amortizando o custo
+de serialização e de ida ao broker.
+"""
+import asyncio
+from typing import Any, Dict, List, Set
+
+from fastapi import HTTPException
+
+from api.services.async_producer import producer
+from shared.config import (
+    VIRTUAL_HOSTS, PUBLISH_BATCH_MAX, PUBLISH_BATCH_WAIT_MS, PUBLISH_QUEUE_MAX
+)
+from shared.utils import setup_logger
+
+# Configuração de logging
+logger = setup_logger("batch_publisher")
+
+# Filas em memória, uma por virtual host
+_queues: Dict[str, asyncio.Queue] = {}
+
+# Corrotinas de drenagem em execução (uma por vhost). Manter a referência
+# é obrigatório: o event loop guarda as tasks apenas por referência fraca
+# e uma task sem dono pode ser coletada no meio da execução
+_drain_tasks: Set[asyncio.Task] = set()
+
+
+def enqueue(vhost: str, task_data: Dict[str, Any]) -> None:
+    """
+    Enfileira uma tarefa para publicação em lote no vhost indicado
+
+    A fila é limitada (PUBLISH_QUEUE_MAX): quando o broker não acompanha
+    a entrada, a pressão volta para o cliente como 503 em vez de a API
+    acumular memória sem limite.
+
+    Args:
+        vhost: Virtual host de destino
+        task_data: Dados da tarefa a ser publicada
+
+    Raises:
+        HTTPException: 503 se a fila do vhost estiver cheia
+    """
+    queue = _queues.get(vhost)
+    if queue is None:
+        queue = _queues.setdefault(vhost, asyncio.Queue(maxsize=PUBLISH_QUEUE_MAX))
+    try:
+        queue.put_nowait(task_data)
+    except asyncio.QueueFull:
+        logger.warning(f"Fila de publicação cheia para o vhost '{vhost}'")
+        raise HTTPException(
+            status_code=503,
+            detail="Serviço sobrecarregado, tente novamente em instantes"
+        )
+
+
+async def submit(vhost: str, task_data: Dict[str, Any], message: str) -> Dict[str, Any]:
+    """
+    Enfileira uma tarefa e monta a resposta 202 padrão dos routers
+
+    Helper compartilhado que substitui os blocos duplicados de
+    enfileiramento + resposta em cada endpoint POST.
+
+    Args:
+        vhost: Virtual host de destino
+        task_data: Dados da tarefa a ser publicada
+        message: Mensagem da resposta ao cliente
+
+    Returns:
+        Dict[str, Any]: Corpo de resposta com task_id e status "pending"
+    """
+    enqueue(vhost, task_data)
+    return {
+        "message": message,
+        "task_id": task_data["id"],
+        "status": "pending"
+    }
+
+
+async def _collect_batch(queue: asyncio.Queue) -> List[Dict[str, Any]]:
+    """
+    Coleta um lote de tarefas da fila
+
+    Bloqueia até chegar a primeira mensagem; depois acumula até
+    PUBLISH_BATCH_MAX itens ou até PUBLISH_BATCH_WAIT_MS sem novas mensagens.
+
+    Args:
+        queue: Fila do vhost
+
+    Returns:
+        List[Dict[str, Any]]: Lote de tarefas coletadas
+    """
+    batch = [await queue.get()]
+
+    while len(batch) < PUBLISH_BATCH_MAX:
+        try:
+            batch.append(queue.get_nowait())
+        except asyncio.QueueEmpty:
+            try:
+                batch.append(
+                    await asyncio.wait_for(
+                        queue.get(), timeout=PUBLISH_BATCH_WAIT_MS / 1000.0
+                    )
+                )
+            except asyncio.TimeoutError:
+                break
+
+    return batch
+
+
+async def _publish_batch(vhost: str, batch: List[Dict[str, Any]]) -> None:
+    """
+    Publica um lote de tarefas no RabbitMQ pelo produtor assíncrono
+
+    Args:
+        vhost: Virtual host de destino
+        batch: Lote de tarefas
+    """
+    # Todas as publicações do lote ficam em voo ao mesmo tempo; em vhosts
+    # com confirms, as confirmações chegam cumulativas e resolvem juntas
+    results = await asyncio.gather(
+        *(producer.send_task_fast(task_data, vhost) for task_data in batch),
+        return_exceptions=True
+    )
+    for task_data, message_id in zip(batch, results):
+        if isinstance(message_id, Exception) or not message_id:
+            logger.error(f"Falha ao enviar tarefa {task_data.get('id')} para a fila")
+
+
+async def _drain_loop(vhost: str) -> None:
+    """
+    Corrotina de longa duração que drena a fila de um vhost em lotes
+
+    Args:
+        vhost: Virtual host a drenar
+    """
+    queue = _queues.setdefault(vhost, asyncio.Queue(maxsize=PUBLISH_QUEUE_MAX))
+    logger.info(f"Drenagem de lotes iniciada para o vhost '{vhost}'")
+
+    while True:
+        batch = await _collect_batch(queue)
+        try:
+            await _publish_batch(vhost, batch)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Erro ao publicar lote no vhost '{vhost}': {e}")
+
+
+def start() -> None:
+    """Inicia as corrotinas de drenagem (chamado no startup da API)"""
+    for vhost in VIRTUAL_HOSTS:
+        _queues.setdefault(vhost, asyncio.Queue(maxsize=PUBLISH_QUEUE_MAX))
+        task = asyncio.create_task(_drain_loop(vhost))
+        _drain_tasks.add(task)
+        task.add_done_callback(_drain_tasks.discard)
+    logger.info(f"Publicador em lote iniciado para {len(VIRTUAL_HOSTS)} vhosts")
+
+
+async def stop() -> None:
+    """Encerra as corrotinas de drenagem (chamado no shutdown da API)"""
+    tasks = list(_drain_tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _drain_tasks.clear()
+    logger.info("Publicador em lote encerrado")
@@ -0,0 +1,155 @@
+"""
+Pool de canais AMQP compartilhado pelos produtores síncronos
+
+Mantém N pares conexão+canal pika por virtual host, de forma que
+publicações concorrentes peguem um par livre em vez de abrir
+conexão/canal a cada chamada. Cada canal tem a própria conexão porque
+BlockingConnection não é thread-safe: mesmo com um canal por thread,
+duas threads publicando no mesmo socket intercalariam frames e
+corromperiam a conexão.
+"""
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+import pika
+
+from shared.config import (
+    RABBITMQ_HOST, RABBITMQ_PORT, RABBITMQ_USER, RABBITMQ_PASS
+)
+from shared.utils import setup_logger
+
+# Configuração de logging
+logger = setup_logger('channel_pool')
+
+# Número de pares conexão+canal por vhost. Cada slot custa uma conexão
+# TCP inteira (não apenas um canal), então o teto é baixo
+CHANNEL_POOL_SIZE = min(8, 2 * (os.cpu_count() or 1))
+
+# Tempo máximo aguardando um canal livre do pool: melhor falhar a
+# publicação do que bloquear o chamador para sempre
+ACQUIRE_TIMEOUT = 30  # segundos
+
+
+def _safe_close(connection: Optional[pika.BlockingConnection]):
+    """
+    Fecha uma conexão ignorando falhas do próprio close()
+
+    Uma conexão já rompida pode lançar ao fechar; o que importa é seguir
+    com a limpeza do pool. Captura Exception (não BaseException), para
+    não engolir KeyboardInterrupt/SystemExit.
+    """
+    if connection is not None and connection.is_open:
+        try:
+            connection.close()
+        except Exception as e:
+            logger.warning("Erro ignorado ao fechar conexão: %s", e)
+
+
+class ChannelPool:
+    """
+    Pool de canais AMQP para um virtual host
+
+    Cada canal do pool vive sobre uma conexão exclusiva: threads
+    concorrentes nunca compartilham um socket, que é a restrição de
+    thread-safety documentada do BlockingConnection. Um par defeituoso
+    é reposto sozinho no acquire, sem derrubar o pool inteiro.
+    """
+
+    def __init__(self, vhost: str, size: int = CHANNEL_POOL_SIZE,
+                 confirm_delivery: bool = False):
+        self.vhost = vhost
+        self.size = size
+        self.confirm_delivery = confirm_delivery
+        self._channels: "queue.Queue" = queue.Queue()
+        self._opened = False
+        self._lock = threading.Lock()
+
+    def _connection_parameters(self) -> pika.ConnectionParameters:
+        """Parâmetros de conexão do vhost deste pool"""
+        credentials = pika.PlainCredentials(RABBITMQ_USER, RABBITMQ_PASS)
+        return pika.ConnectionParameters(
+            host=RABBITMQ_HOST,
+            port=RABBITMQ_PORT,
+            virtual_host=self.vhost,
+            credentials=credentials,
+            heartbeat=60,
+            # TCP_USER_TIMEOUT: a pilha TCP desiste de retransmitir após
+            # 20s, derrubando a conexão em vez de pendurar o publicador.
+            # (TCP_NODELAY não entra aqui: o pika já o liga sozinho em
+            # todo socket e ignora a chave em tcp_options)
+            tcp_options={'TCP_USER_TIMEOUT': 20000},
+            socket_timeout=5,
+            blocked_connection_timeout=300
+        )
+
+    def _new_pair(self):
+        """Abre uma conexão dedicada com um canal de publicação"""
+        connection = pika.BlockingConnection(self._connection_parameters())
+        channel = connection.channel()
+        if self.confirm_delivery:
+            # Publicações neste canal aguardam basic.ack do broker;
+            # falhas de roteamento/enfileiramento viram exceção
+            channel.confirm_delivery()
+        return connection, channel
+
+    def open(self):
+        """Abre as conexões e pré-aloca todos os pares do pool"""
+        with self._lock:
+            if self._opened:
+                return
+
+            # Esvaziar pares antigos (de uma abertura anterior)
+            while not self._channels.empty():
+                connection, _ = self._channels.get_nowait()
+                _safe_close(connection)
+
+            for _ in range(self.size):
+                self._channels.put(self._new_pair())
+            self._opened = True
+
+            logger.info(f"Pool de {self.size} canais aberto para o vhost '{self.vhost}'")
+
+    @contextmanager
+    def acquire(self):
+        """
+        Obtém um canal livre do pool (bloqueia até ACQUIRE_TIMEOUT)
+
+        O slot volta para a fila aconteça o que acontecer: se a reposição
+        de um par defeituoso falhar (broker fora do ar), o par morto
+        retorna como sentinela e a próxima aquisição tenta repor de novo
+        — sem isso cada falha encolheria o pool até o get() travar todo
+        mundo para sempre.
+        """
+        if not self._opened:
+            self.open()
+
+        try:
+            connection, channel = self._channels.get(timeout=ACQUIRE_TIMEOUT)
+        except queue.Empty:
+            raise RuntimeError(
+                f"Nenhum canal livre no pool do vhost '{self.vhost}' "
+                f"após {ACQUIRE_TIMEOUT}s"
+            ) from None
+        try:
+            # Repor apenas o par defeituoso, sem tocar no resto do pool
+            if not connection.is_open or not channel.is_open:
+                _safe_close(connection)
+                connection, channel = self._new_pair()
+            yield channel
+        finally:
+            self._channels.put((connection, channel))
+
+    def close(self):
+        """Fecha as conexões e descarta os canais do pool"""
+        with self._lock:
+            self._opened = False
+            closed_any = False
+            while not self._channels.empty():
+                connection, _ = self._channels.get_nowait()
+                _safe_close(connection)
+                closed_any = True
+            if closed_any:
+                logger.info(f"Pool de canais fechado para o vhost '{self.vhost}'")
@@ -1,21 +1,53 @@
 """
 Produtor Dramatiq para envio de mensagens a partir da API
 """
-import json
-import uuid
+import orjson
+import pika
 import dramatiq
 from dramatiq.brokers.rabbitmq import RabbitmqBroker
 from typing import Dict, Any, Optional
 
 from shared.config import (
     RABBITMQ_HOST, RABBITMQ_PORT, RABBITMQ_USER, RABBITMQ_PASS,
-    QUEUE_NAME, VIRTUAL_HOSTS, TASK_TYPE_TO_VHOST
+    QUEUE_NAME, VIRTUAL_HOSTS_SET, TASK_TYPE_TO_VHOST
 )
-from shared.utils import setup_logger, generate_task_id, timestamp_now, json_serializer
+from shared.utils import setup_logger, generate_task_id
+from api.services.channel_pool import ChannelPool
 
 # Configuração de logging
 logger = setup_logger('dramatiq_producer')
 
+# Vhosts sensíveis a durabilidade, onde os canais publicam com confirmação.
+# Nos demais vhosts as confirmações ficam desligadas no caminho quente,
+# evitando uma ida e volta de rede por mensagem.
+CONFIRM_DELIVERY_VHOSTS = frozenset({"fluxo_clinico"})
+
+
+# Pools de canais por vhost
+_channel_pools: Dict[str, ChannelPool] = {}
+
+# frozenset tem membership O(1) com constante menor que a lista de config
+_VALID_VHOSTS = VIRTUAL_HOSTS_SET
+
+
+def get_channel_pool(vhost: str) -> ChannelPool:
+    """
+    Obtém (criando se necessário) o pool de canais de um virtual host
+
+    Args:
+        vhost: Virtual host desejado
+
+    Returns:
+        ChannelPool: Pool de canais do vhost
+    """
+    pool = _channel_pools.get(vhost)
+    if pool is None:
+        pool = _channel_pools[vhost] = ChannelPool(
+            vhost, confirm_delivery=vhost in CONFIRM_DELIVERY_VHOSTS
+        )
+    return pool
+
+
 # Criar brokers para cada vhost
 brokers = {}
 
@@ -33,8 +65,8 @@ def get_broker(vhost):
         # URL de conexão para o RabbitMQ
         url = f"amqp://{RABBITMQ_USER}:{RABBITMQ_PASS}@{RABBITMQ_HOST}:{RABBITMQ_PORT}/{vhost}"
         
-        # Criar broker
-        broker = RabbitmqBroker(url=url)
+        # Criar broker sem aguardar confirmação de entrega por mensagem
+        broker = RabbitmqBroker(url=url, confirm_delivery=False)
         brokers[vhost] = broker
     
     return brokers[vhost]
@@ -48,7 +80,8 @@ ingestao_dados_broker = get_broker("ingestao_dados")
 # Registrar o broker padrão com o Dramatiq
 dramatiq.set_broker(fluxo_clinico_broker)
 
-# Definir os atores do Dramatiq
+# Definir os atores do Dramatiq (mantidos para o consumo no lado do worker;
+# a publicação usa o pool de canais diretamente)
 @dramatiq.actor(queue_name=QUEUE_NAME, broker=fluxo_clinico_broker)
 def process_fluxo_clinico(task_data_json):
     """Ator para processamento do fluxo clínico"""
@@ -72,14 +105,19 @@ def process_fluxo_ingestao(task_data_json):
 class DramatiqProducer:
     """Classe para gerenciar o envio de tarefas via Dramatiq"""
     
-    def send_task(self, task_data: Dict[str, Any], vhost: Optional[str] = None) -> Optional[str]:
+    def send_task(self, task_data: Dict[str, Any], vhost: Optional[str] = None,
+                  _dumps=orjson.dumps, _mid=generate_task_id,
+                  _vhosts=_VALID_VHOSTS) -> Optional[str]:
         """
         Envia uma tarefa para o Dramatiq
-        
+
+        Os argumentos com underscore são bindings locais de funções quentes
+        (acesso LOAD_FAST em vez de LOAD_GLOBAL) e não devem ser passados.
+
         Args:
             task_data: Dados da tarefa a ser enviada
             vhost: Virtual host específico (detectado automaticamente se None)
-        
+
         Returns:
             Optional[str]: ID da mensagem se enviada com sucesso, None caso contrário
         """
@@ -94,7 +132,7 @@ class DramatiqProducer:
                     return None
             
             # Validar vhost
-            if vhost not in VIRTUAL_HOSTS:
+            if vhost not in _vhosts:
                 logger.error(f"Virtual host '{vhost}' não está na lista de vhosts válidos")
                 return None
             
@@ -102,30 +140,28 @@ class DramatiqProducer:
             if 'id' not in task_data:
                 task_data['id'] = generate_task_id()
             
-            # Adicionar timestamp se não existir
-            if 'timestamp' not in task_data:
-                task_data['timestamp'] = timestamp_now()
-            
             # Gerar message_id
-            message_id = str(uuid.uuid4())
+            message_id = _mid()
             task_data['message_id'] = message_id
             
-            # Converter para JSON
-            task_data_json = json.dumps(task_data, default=json_serializer)
-            
-            # Selecionar o ator apropriado baseado no vhost
-            if vhost == "fluxo_clinico":
-                process_fluxo_clinico.send(task_data_json)
-            elif vhost == "fluxo_exames":
-                process_fluxo_exames.send(task_data_json)
-            elif vhost == "fluxo_opme":
-                process_fluxo_opme.send(task_data_json)
-            elif vhost == "ingestao_dados":
-                process_fluxo_ingestao.send(task_data_json)
-            else:
-                logger.error(f"Vhost '{vhost}' não suportado")
-                return None
-            
+            # Converter para JSON (orjson devolve bytes prontos para o corpo
+            # da mensagem, sem passo extra de encode)
+            task_data_json = _dumps(task_data, default=str)
+
+            # Publicar direto pelo pool de canais do vhost
+            # (evita o actor.send, que refaz o lookup de broker por mensagem)
+            with get_channel_pool(vhost).acquire() as channel:
+                channel.basic_publish(
+                    exchange='',  # Exchange padrão
+                    routing_key=QUEUE_NAME,
+                    body=task_data_json,
+                    properties=pika.BasicProperties(
+                        delivery_mode=2,  # Mensagem persistente
+                        content_type='application/json',
+                        message_id=message_id
+                    )
+                )
+
             logger.info(f"Tarefa enviada via Dramatiq para vhost '{vhost}'. "
                         f"ID da tarefa: {task_data['id']}, Message ID: {message_id}")
             
@@ -133,16 +169,35 @@ class DramatiqProducer:
         
         except Exception as e:
             logger.error(f"Erro ao enviar tarefa via Dramatiq: {e}")
+            # Descartar o pool problemático: a próxima tentativa reabre
+            # conexões novas em vez de drenar slots de um pool quebrado
+            if vhost:
+                self.close(vhost)
             return None
 
-    # Métodos para compatibilidade com o produtor anterior
     def connect(self, vhost: str):
-        """Método mantido para compatibilidade"""
-        pass
-    
+        """
+        Aquece o pool de canais de um vhost (abre conexão e canais)
+
+        Args:
+            vhost: Virtual host para conectar
+        """
+        get_channel_pool(vhost).open()
+
     def close(self, vhost: Optional[str] = None):
-        """Método mantido para compatibilidade"""
-        pass
+        """
+        Fecha o pool de canais de um vhost (ou de todos se None)
+
+        Args:
+            vhost: Virtual host específico para fechar (ou todos se None)
+        """
+        if vhost:
+            pool = _channel_pools.get(vhost)
+            if pool:
+                pool.close()
+        else:
+            for pool in _channel_pools.values():
+                pool.close()
 
 # Instância singleton para ser importada pelo FastAPI
 producer = DramatiqProducer()
\ No newline at end of file
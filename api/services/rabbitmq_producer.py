@@ -2,100 +2,150 @@
 Serviço para produção de mensagens no RabbitMQ a partir da API
 """
 import pika
-import json
-import uuid
-from datetime import datetime
-from typing import Dict, Any, Optional
+import orjson
+import threading
+from typing import Dict, Any, List, Optional
 
+from api.services.channel_pool import ChannelPool
 from shared.config import (
-    RABBITMQ_HOST, RABBITMQ_PORT, RABBITMQ_USER, RABBITMQ_PASS,
-    QUEUE_NAME, VIRTUAL_HOSTS, TASK_TYPE_TO_VHOST
+    RABBITMQ_HOST, RABBITMQ_PORT,
+    QUEUE_NAME, VIRTUAL_HOSTS_SET, TASK_TYPE_TO_VHOST
 )
 from shared.utils import setup_logger, generate_task_id, timestamp_now
 
 # Configuração de logging
 logger = setup_logger('rabbitmq_producer')
 
-# Serializador personalizado para datetime
-def json_serializer(obj):
-    """Serializador personalizado para objetos que o JSON padrão não suporta"""
-    if isinstance(obj, datetime):
-        return obj.isoformat()
-    raise TypeError(f"Type {type(obj)} not serializable")
+# Apelidos de módulo: LOAD_GLOBAL local em vez de busca no dict de config
+_TASK_TYPE_TO_VHOST = TASK_TYPE_TO_VHOST
+_VHOSTS = VIRTUAL_HOSTS_SET
+
+# Propriedades-modelo por thread: com o pool de canais várias threads
+# publicam ao mesmo tempo, então cada uma reutiliza o próprio template
+# (apenas o message_id é reatribuído por mensagem)
+_props_local = threading.local()
+
+def _get_props() -> pika.BasicProperties:
+    """Obtém o template de BasicProperties da thread atual"""
+    props = getattr(_props_local, 'props', None)
+    if props is None:
+        props = pika.BasicProperties(
+            delivery_mode=2,  # Mensagem persistente
+            content_type='application/json'
+        )
+        _props_local.props = props
+    return props
 
 class RabbitMQProducer:
     """Classe para gerenciar a produção de mensagens para o RabbitMQ"""
-    
+
     def __init__(self):
-        self.connections = {}  # Conexões por vhost
-        self.channels = {}     # Canais por vhost
-    
+        self.pools: Dict[str, ChannelPool] = {}  # Pools de canais por vhost
+        self._senders: Dict[str, Any] = {}       # Fechos de envio especializados por vhost
+
     def connect(self, vhost: str):
         """
-        Estabelece conexão com o RabbitMQ para um virtual host específico
-        
+        Abre (se necessário) o pool de canais de um virtual host
+
+        Uma única conexão por vhost com N canais pré-abertos: requisições
+        concorrentes pegam um canal livre em vez de disputar um canal
+        singleton ou abrir conexões novas.
+
         Args:
             vhost: Virtual host para conectar
         """
-        # Verificar se já existe uma conexão aberta
-        if vhost in self.connections and self.connections[vhost].is_open:
-            return
-            
-        credentials = pika.PlainCredentials(RABBITMQ_USER, RABBITMQ_PASS)
-        parameters = pika.ConnectionParameters(
-            host=RABBITMQ_HOST,
-            port=RABBITMQ_PORT,
-            virtual_host=vhost,
-            credentials=credentials,
-            heartbeat=60
-        )
-        
-        self.connections[vhost] = pika.BlockingConnection(parameters)
-        self.channels[vhost] = self.connections[vhost].channel()
-        
-        # Verificar se a fila existe (não declarar, pois é uma quorum queue)
-        try:
-            self.channels[vhost].queue_declare(queue=QUEUE_NAME, passive=True)
-            logger.info(f"Fila '{QUEUE_NAME}' encontrada no vhost '{vhost}'")
-        except Exception as e:
-            logger.warning(f"Erro ao verificar fila: {e}")
-            logger.warning("As Quorum Queues devem ser declaradas com políticas específicas no RabbitMQ")
-        
-        logger.info(f"Conectado ao RabbitMQ ({RABBITMQ_HOST}:{RABBITMQ_PORT}, vhost={vhost})")
-    
+        pool = self.pools.get(vhost)
+        if pool is None:
+            # Publisher confirms habilitados uma vez por canal: o caminho
+            # síncrono é o de durabilidade e o envio em lote amortiza a
+            # confirmação por bloco
+            pool = self.pools[vhost] = ChannelPool(vhost, confirm_delivery=True)
+            pool.open()
+
+            # Especializar o caminho de publicação deste vhost: o fecho
+            # captura o pool e a fila, eliminando os lookups por mensagem
+            self._senders[vhost] = self._make_sender(pool)
+
+            # Verificar se a fila existe (não declarar, pois é uma quorum queue)
+            try:
+                with pool.acquire() as channel:
+                    channel.queue_declare(queue=QUEUE_NAME, passive=True)
+                logger.info("Fila '%s' encontrada no vhost '%s'", QUEUE_NAME, vhost)
+            except Exception as e:
+                logger.warning("Erro ao verificar fila: %s", e)
+                logger.warning("As Quorum Queues devem ser declaradas com políticas específicas no RabbitMQ")
+
+            logger.info("Conectado ao RabbitMQ (%s:%s, vhost=%s)", RABBITMQ_HOST, RABBITMQ_PORT, vhost)
+        else:
+            # O pool reabre a conexão sozinho se ela tiver caído
+            pool.open()
+
+    def _make_sender(self, pool: ChannelPool):
+        """
+        Gera a função de publicação especializada de um vhost
+
+        Avaliação parcial: pool, fila e helpers viram default args /
+        variáveis capturadas (LOAD_FAST/LOAD_DEREF), removendo os
+        lookups de dict e de módulo do laço de publicação.
+
+        Args:
+            pool: Pool de canais do vhost
+
+        Returns:
+            Função que publica um task_data e devolve o message_id
+        """
+        acquire = pool.acquire
+
+        def _send(task_data: Dict[str, Any],
+                  _dumps=orjson.dumps, _mid=generate_task_id,
+                  _now=timestamp_now, _queue=QUEUE_NAME) -> str:
+            task_data.setdefault('id', _mid())
+            task_data.setdefault('timestamp', _now())
+
+            message_body = _dumps(task_data, default=str)
+            message_id = _mid()
+
+            props = _get_props()
+            props.message_id = message_id
+            with acquire() as channel:
+                channel.basic_publish(
+                    exchange='',
+                    routing_key=_queue,
+                    body=message_body,
+                    properties=props
+                )
+            return message_id
+
+        return _send
+
     def close(self, vhost: Optional[str] = None):
         """
-        Fecha a conexão com o RabbitMQ
-        
+        Fecha os pools de canais com o RabbitMQ
+
         Args:
             vhost: Virtual host específico para fechar (ou todos se None)
         """
         if vhost:
-            # Fechar conexão específica
-            if vhost in self.connections and self.connections[vhost].is_open:
-                self.connections[vhost].close()
-                logger.info(f"Conexão com RabbitMQ fechada para vhost '{vhost}'")
-                del self.connections[vhost]
-                if vhost in self.channels:
-                    del self.channels[vhost]
+            pool = self.pools.pop(vhost, None)
+            self._senders.pop(vhost, None)
+            if pool is not None:
+                pool.close()
+                logger.info("Conexão com RabbitMQ fechada para vhost '%s'", vhost)
         else:
-            # Fechar todas as conexões
-            for vh, conn in list(self.connections.items()):
-                if conn.is_open:
-                    conn.close()
-                    logger.info(f"Conexão com RabbitMQ fechada para vhost '{vh}'")
-            
-            self.connections = {}
-            self.channels = {}
-    
+            for vh, pool in list(self.pools.items()):
+                pool.close()
+                logger.info("Conexão com RabbitMQ fechada para vhost '%s'", vh)
+            self.pools = {}
+            self._senders = {}
+
     def send_task(self, task_data: Dict[str, Any], vhost: Optional[str] = None) -> Optional[str]:
         """
         Envia uma tarefa para a fila do RabbitMQ
-        
+
         Args:
             task_data: Dados da tarefa a ser enviada
             vhost: Virtual host específico (detectado automaticamente se None)
-        
+
         Returns:
             Optional[str]: ID da mensagem se enviada com sucesso, None caso contrário
         """
@@ -103,56 +153,146 @@ class RabbitMQProducer:
             # Determinar vhost baseado no tipo da tarefa se não especificado
             if vhost is None:
                 task_type = task_data.get('tipo', '')
-                vhost = TASK_TYPE_TO_VHOST.get(task_type)
-                
+                vhost = _TASK_TYPE_TO_VHOST.get(task_type)
+
                 if not vhost:
-                    logger.error(f"Tipo de tarefa '{task_type}' não mapeado para nenhum vhost")
+                    logger.error("Tipo de tarefa '%s' não mapeado para nenhum vhost", task_type)
                     return None
-            
-            # Validar vhost
-            if vhost not in VIRTUAL_HOSTS:
-                logger.error(f"Virtual host '{vhost}' não está na lista de vhosts válidos")
+
+            # Validar vhost (frozenset: pertencimento O(1))
+            if vhost not in _VHOSTS:
+                logger.error("Virtual host '%s' não está na lista de vhosts válidos", vhost)
                 return None
-            
-            # Garantir que temos uma conexão
+
+            return self.send_task_to(vhost, task_data)
+
+        except Exception as e:
+            logger.error("Erro ao enviar tarefa para a fila: %s", e)
+            return None
+
+    def send_task_to(self, vhost: str, task_data: Dict[str, Any]) -> Optional[str]:
+        """
+        Caminho rápido de envio para vhost conhecido
+
+        Assume vhost válido: sem resolução por tipo nem checagem de
+        pertencimento. Endpoints que conhecem o próprio fluxo (ex.:
+        /clinico/* publica em 'fluxo_clinico') devem chamar este método
+        diretamente em vez de send_task.
+
+        Args:
+            vhost: Virtual host de destino (já validado pelo chamador)
+            task_data: Dados da tarefa a ser enviada
+
+        Returns:
+            Optional[str]: ID da mensagem se enviada com sucesso, None caso contrário
+        """
+        try:
+            # Garantir que temos um pool aberto
             self.connect(vhost)
-            
-            # Adicionar ID à tarefa se não existir
-            if 'id' not in task_data:
-                task_data['id'] = generate_task_id()
-            
-            # Adicionar timestamp se não existir
-            if 'timestamp' not in task_data:
-                task_data['timestamp'] = timestamp_now()
-            
-            # Converter os dados para JSON usando o serializador personalizado
-            message_body = json.dumps(task_data, default=json_serializer)
-            
-            # Gerar message_id
-            message_id = str(uuid.uuid4())
-            
-            # Publicar a mensagem
-            self.channels[vhost].basic_publish(
-                exchange='',  # Exchange padrão
-                routing_key=QUEUE_NAME,  # Nome da fila
-                body=message_body,
-                properties=pika.BasicProperties(
-                    delivery_mode=2,  # Mensagem persistente
-                    content_type='application/json',
-                    message_id=message_id
-                )
-            )
-            
-            logger.info(f"Tarefa enviada para a fila '{QUEUE_NAME}' no vhost '{vhost}'. "
-                        f"ID da tarefa: {task_data['id']}, Message ID: {message_id}")
+
+            # Publicar pelo fecho especializado do vhost
+            message_id = self._senders[vhost](task_data)
+
+            logger.info("Tarefa enviada para a fila '%s' no vhost '%s'. "
+                        "ID da tarefa: %s, Message ID: %s",
+                        QUEUE_NAME, vhost, task_data['id'], message_id)
             return message_id
-            
+
         except Exception as e:
-            logger.error(f"Erro ao enviar tarefa para a fila: {e}")
-            if vhost and vhost in self.connections:
-                # Fechar conexão problemática para reconectar na próxima tentativa
+            logger.error("Erro ao enviar tarefa para a fila: %s", e)
+            if vhost in self.pools:
+                # Fechar pool problemático para reconectar na próxima tentativa
                 self.close(vhost)
             return None
 
+    def send_tasks(self, tasks: List[Dict[str, Any]], vhost: Optional[str] = None,
+                   batch_size: int = 64) -> List[Optional[str]]:
+        """
+        Envia várias tarefas para as filas do RabbitMQ em lotes
+
+        Agrupa as tarefas por vhost e publica em blocos de batch_size
+        frames seguidos no mesmo canal, amortizando as idas e voltas ao
+        broker em vez de pagar uma confirmação síncrona por mensagem.
+        Fluxos de alta taxa (ex.: carga_pacientes) devem preferir este
+        método ao send_task unitário.
+
+        Args:
+            tasks: Lista de dados de tarefas a serem enviadas
+            vhost: Virtual host comum a todas (detectado por tarefa se None)
+            batch_size: Tamanho de cada bloco de publicação
+
+        Returns:
+            List[Optional[str]]: message_id por tarefa (None para as que falharam),
+            na mesma ordem da lista de entrada
+        """
+        results: List[Optional[str]] = [None] * len(tasks)
+
+        # Agrupar índices por vhost resolvido
+        groups: Dict[str, List[int]] = {}
+        for i, task_data in enumerate(tasks):
+            task_vhost = vhost
+            if task_vhost is None:
+                task_type = task_data.get('tipo', '')
+                task_vhost = _TASK_TYPE_TO_VHOST.get(task_type)
+                if not task_vhost:
+                    logger.error("Tipo de tarefa '%s' não mapeado para nenhum vhost", task_type)
+                    continue
+            if task_vhost not in _VHOSTS:
+                logger.error("Virtual host '%s' não está na lista de vhosts válidos", task_vhost)
+                continue
+            groups.setdefault(task_vhost, []).append(i)
+
+        for task_vhost, indices in groups.items():
+            try:
+                self.connect(task_vhost)
+            except Exception as e:
+                logger.error("Erro ao conectar ao vhost '%s': %s", task_vhost, e)
+                continue
+
+            props = _get_props()
+
+            # Publicar em blocos: os frames do bloco vão seguidos no socket
+            # e um eventual nack é tratado uma vez por bloco. O canal é
+            # mantido pelo grupo inteiro para não pagar acquire por mensagem.
+            # O acquire fica dentro do try: uma falha (pool esgotado,
+            # broker fora do ar) marca o grupo como None e fecha o pool
+            # para autocura, como no send_task_to — o contrato de devolver
+            # List[Optional[str]] não admite exceção escapando daqui
+            try:
+                with self.pools[task_vhost].acquire() as channel:
+                    for start in range(0, len(indices), batch_size):
+                        chunk = indices[start:start + batch_size]
+                        # Pré-gerar os IDs do bloco em uma compreensão, mantendo a
+                        # geração em um laço apertado antes das publicações
+                        message_ids = [generate_task_id() for _ in chunk]
+                        try:
+                            for i, message_id in zip(chunk, message_ids):
+                                task_data = tasks[i]
+                                task_data.setdefault('id', generate_task_id())
+                                task_data.setdefault('timestamp', timestamp_now())
+
+                                props.message_id = message_id
+                                channel.basic_publish(
+                                    exchange='',
+                                    routing_key=QUEUE_NAME,
+                                    body=orjson.dumps(task_data, default=str),
+                                    properties=props
+                                )
+                                results[i] = message_id
+                        except (pika.exceptions.UnroutableError, pika.exceptions.NackError) as e:
+                            logger.error("Lote rejeitado pelo broker no vhost '%s': %s", task_vhost, e)
+                            for i in chunk:
+                                results[i] = None
+                        except Exception as e:
+                            logger.error("Erro ao enviar lote para o vhost '%s': %s", task_vhost, e)
+                            for i in chunk:
+                                results[i] = None
+                            break
+            except Exception as e:
+                logger.error("Erro ao publicar lote no vhost '%s': %s", task_vhost, e)
+                self.close(task_vhost)
+
+        return results
+
 # Instância singleton para ser importada pelo FastAPI
-producer = RabbitMQProducer()
\ No newline at end of file
+producer = RabbitMQProducer()
@@ -0,0 +1,240 @@
+"""
+Publicador assíncrono sobre pika.SelectConnection
+
+Alternativa ao caminho BlockingConnection dos pools: uma thread de IO por
+virtual host roda o ioloop do pika, os chamadores apenas enfileiram a
+tarefa e recebem um Future resolvido quando o broker confirma (basic.ack).
+Publicações sobrepõem-se às confirmações anteriores em vez de bloquear
+uma a uma, que é o padrão recomendado pelos mantenedores do pika para
+throughput alto em Python puro.
+"""
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, Optional
+
+import orjson
+import pika
+
+from shared.config import (
+    RABBITMQ_HOST, RABBITMQ_PORT, RABBITMQ_USER, RABBITMQ_PASS, QUEUE_NAME
+)
+from shared.utils import setup_logger, generate_task_id, timestamp_now
+
+# Configuração de logging
+logger = setup_logger('select_publisher')
+
+# Intervalo entre tentativas de reconexão da thread de IO
+RECONNECT_DELAY = 5  # segundos
+
+
+class SelectConnectionPublisher:
+    """
+    Publicador de um virtual host sobre SelectConnection
+
+    publish() pode ser chamado de qualquer thread; o envio de fato e as
+    confirmações acontecem na thread do ioloop.
+    """
+
+    def __init__(self, vhost: str):
+        self.vhost = vhost
+        self._pending: "queue.Queue" = queue.Queue()
+        self._connection: Optional[pika.SelectConnection] = None
+        self._channel = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        # Acordado pelo stop() para abortar a espera entre reconexões
+        self._stop_wait = threading.Event()
+        # Futures aguardando confirmação, por delivery tag
+        self._unconfirmed: Dict[int, Future] = {}
+        self._next_tag = 0
+
+    def start(self):
+        """Inicia a thread do ioloop (idempotente)"""
+        if self._running:
+            return
+        self._running = True
+        self._stop_wait.clear()
+        self._thread = threading.Thread(
+            target=self._run, name=f"select-publisher-{self.vhost}", daemon=True
+        )
+        self._thread.start()
+        logger.info("Publicador SelectConnection iniciado para o vhost '%s'", self.vhost)
+
+    def _run(self):
+        """
+        Corpo da thread de IO: conecta, roda o ioloop e reconecta em queda
+
+        O ioloop só devolve o controle quando a conexão cai (ou stop()
+        fecha): enquanto _running estiver ligado, o laço reabre a
+        conexão e o _on_channel_open volta a drenar a fila interna.
+        """
+        credentials = pika.PlainCredentials(RABBITMQ_USER, RABBITMQ_PASS)
+        parameters = pika.ConnectionParameters(
+            host=RABBITMQ_HOST,
+            port=RABBITMQ_PORT,
+            virtual_host=self.vhost,
+            credentials=credentials,
+            heartbeat=60,
+            # Retransmissões TCP desistem após 20s em vez de pendurar a
+            # thread de IO numa conexão morta (o pika já liga TCP_NODELAY
+            # sozinho em todo socket)
+            tcp_options={'TCP_USER_TIMEOUT': 20000}
+        )
+        while self._running:
+            self._connection = pika.SelectConnection(
+                parameters,
+                on_open_callback=self._on_connection_open,
+                on_open_error_callback=self._on_connection_error,
+                on_close_callback=self._on_connection_closed
+            )
+            self._connection.ioloop.start()
+            if self._running:
+                logger.info("Reconectando ao vhost '%s' em %ds...",
+                            self.vhost, RECONNECT_DELAY)
+                self._stop_wait.wait(RECONNECT_DELAY)
+        self._connection = None
+
+    def _on_connection_open(self, connection):
+        """Conexão aberta: abrir o canal de publicação"""
+        connection.channel(on_open_callback=self._on_channel_open)
+
+    def _on_connection_error(self, connection, error):
+        """Falha no handshake: falhar tudo que estiver pendente"""
+        logger.error("Erro ao conectar ao vhost '%s': %s", self.vhost, error)
+        self._fail_all(error)
+        connection.ioloop.stop()
+
+    def _on_connection_closed(self, connection, reason):
+        """Conexão fechada: devolver o controle ao laço do _run"""
+        self._channel = None
+        if self._running:
+            logger.warning("Conexão perdida com o vhost '%s': %s", self.vhost, reason)
+            # Confirmações em voo nunca chegarão; falhar os Futures agora
+            # em vez de deixá-los pendurados até a reconexão
+            self._fail_all(reason)
+        connection.ioloop.stop()
+
+    def _on_channel_open(self, channel):
+        """Canal aberto: ligar confirms e drenar o que já foi enfileirado"""
+        self._channel = channel
+        # Os delivery tags reiniciam com o canal: nenhum Future antigo
+        # pode sobrar em _unconfirmed, ou um ack do canal novo resolveria
+        # o Future de outra mensagem
+        if self._unconfirmed:
+            self._fail_all("canal reaberto com confirmações pendentes")
+        self._next_tag = 0
+        channel.confirm_delivery(ack_nack_callback=self._on_delivery_confirmation)
+        self._drain()
+
+    def _on_delivery_confirmation(self, method_frame):
+        """
+        Resolve os Futures confirmados pelo broker
+
+        O broker pode confirmar cumulativamente (multiple=True), então um
+        único ack resolve todos os tags menores ou iguais ao recebido.
+        """
+        method = method_frame.method
+        acked = method.NAME.split('.')[1].lower() == 'ack'
+        tags = (
+            [t for t in list(self._unconfirmed) if t <= method.delivery_tag]
+            if method.multiple else [method.delivery_tag]
+        )
+        for tag in tags:
+            future = self._unconfirmed.pop(tag, None)
+            if future is None:
+                continue
+            if acked:
+                future.set_result(True)
+            else:
+                future.set_exception(
+                    RuntimeError(f"Mensagem rejeitada pelo broker (tag {tag})")
+                )
+
+    def _drain(self):
+        """Publica tudo que estiver na fila interna (thread do ioloop)"""
+        if self._channel is None or not self._channel.is_open:
+            return
+        while True:
+            try:
+                task_data, message_id, future = self._pending.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                props = pika.BasicProperties(
+                    delivery_mode=2,
+                    content_type='application/json',
+                    message_id=message_id
+                )
+                self._channel.basic_publish(
+                    exchange='',
+                    routing_key=QUEUE_NAME,
+                    body=orjson.dumps(task_data, default=str),
+                    properties=props
+                )
+                self._next_tag += 1
+                self._unconfirmed[self._next_tag] = future
+            except Exception as e:
+                logger.error("Erro ao publicar no vhost '%s': %s", self.vhost, e)
+                future.set_exception(e)
+
+    def _fail_all(self, reason):
+        """Falha todos os Futures pendentes e não confirmados"""
+        error = RuntimeError(str(reason))
+        while True:
+            try:
+                _, _, future = self._pending.get_nowait()
+            except queue.Empty:
+                break
+            future.set_exception(error)
+        for future in self._unconfirmed.values():
+            if not future.done():
+                future.set_exception(error)
+        self._unconfirmed.clear()
+
+    def publish(self, task_data: Dict[str, Any]) -> "Future":
+        """
+        Enfileira uma tarefa para publicação
+
+        Pode ser chamado de qualquer thread. O Future devolvido resolve
+        com True no basic.ack do broker; quem não precisa da confirmação
+        pode simplesmente ignorá-lo (fire-and-forget).
+
+        Args:
+            task_data: Dados da tarefa a ser publicada
+
+        Returns:
+            Future: resolvido na confirmação, message_id em .message_id
+        """
+        task_data.setdefault('id', generate_task_id())
+        task_data.setdefault('timestamp', timestamp_now())
+        message_id = generate_task_id()
+
+        future: Future = Future()
+        future.message_id = message_id
+
+        # Falhar rápido com o publicador parado: sem thread de IO não há
+        # quem drene a fila nem resolva o Future
+        if not self._running:
+            future.set_exception(
+                RuntimeError(f"Publicador do vhost '{self.vhost}' não está rodando")
+            )
+            return future
+
+        self._pending.put((task_data, message_id, future))
+
+        if self._connection is not None and self._connection.is_open:
+            # O publish de fato precisa acontecer na thread do ioloop
+            self._connection.ioloop.add_callback_threadsafe(self._drain)
+        return future
+
+    def stop(self):
+        """Encerra a thread de IO e fecha a conexão"""
+        self._running = False
+        self._stop_wait.set()
+        if self._connection is not None and self._connection.is_open:
+            self._connection.ioloop.add_callback_threadsafe(self._connection.close)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        logger.info("Publicador SelectConnection encerrado para o vhost '%s'", self.vhost)
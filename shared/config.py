@@ -1,6 +1,8 @@
 """
 Configurações compartilhadas para toda a aplicação
 """
+import os
+
 from typing import Dict, List
 from shared.env import get_env
 
@@ -44,14 +46,48 @@ TASK_TYPE_TO_VHOST: Dict[str, str] = {
     "carga_exames": "ingestao_dados"
 }
 
+# Versão em frozenset para checagens de pertencimento O(1) no hot path
+VIRTUAL_HOSTS_SET: frozenset = frozenset(VIRTUAL_HOSTS)
+
+# Configurações do publicador em lote da API
+PUBLISH_BATCH_MAX = int(get_env("PUBLISH_BATCH_MAX", "100"))
+PUBLISH_BATCH_WAIT_MS = int(get_env("PUBLISH_BATCH_WAIT_MS", "20"))
+# Limite da fila em memória por vhost: acima disso a API responde 503
+PUBLISH_QUEUE_MAX = int(get_env("PUBLISH_QUEUE_MAX", "10000"))
+
 # Configurações da API
 API_HOST = get_env("API_HOST", "0.0.0.0")
 API_PORT = int(get_env("API_PORT", "8000"))
-API_WORKERS = int(get_env("API_WORKERS", "1"))
+API_WORKERS = int(get_env("API_WORKERS", str(os.cpu_count() or 1)))
+# Recarga automática apenas em desenvolvimento (desativa múltiplos workers)
+API_RELOAD = get_env("API_RELOAD", "false").lower() in ("1", "true", "yes")
+
+# Configurações do LLM dos handlers CrewAI
+OPENAI_MODEL_NAME = get_env("OPENAI_MODEL_NAME", "gpt-4")
+# Prompt caching do provedor para os prefixos estáticos dos agentes
+PROMPT_CACHE_ENABLED = get_env("PROMPT_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+# Modo verboso do CrewAI: cada pensamento intermediário vira print, caro
+# demais para o caminho quente — ligar apenas para depuração
+CREWAI_VERBOSE = get_env("CREWAI_VERBOSE", "0").lower() in ("1", "true", "yes")
+
+# Cache de resultados dos workers (desativado quando REDIS_URL é vazio)
+REDIS_URL = get_env("REDIS_URL", "")
+RESULT_CACHE_TTL = int(get_env("RESULT_CACHE_TTL", "86400"))
 
 # Configurações do Worker
-WORKER_PREFETCH_COUNT = int(get_env("WORKER_PREFETCH_COUNT", "1"))
+# Prefetch 100 mantém os workers alimentados em rajadas sem memória
+# ilimitada (prefetch alto demais acumula mensagens não confirmadas)
+WORKER_PREFETCH_COUNT = int(get_env("WORKER_PREFETCH_COUNT", "100"))
 WORKER_RECONNECT_DELAY = int(get_env("WORKER_RECONNECT_DELAY", "5"))
+# Consumidores (canais) por vhost sobre a mesma conexão TCP: o broker
+# reparte as entregas entre eles em round-robin
+CONSUMERS_PER_VHOST = int(get_env("CONSUMERS_PER_VHOST", "2"))
+# Tentativas por mensagem antes de desviar para a fila de dead-letter
+# (requeue ilimitado transforma mensagem-veneno em gasto infinito de LLM)
+WORKER_MAX_RETRIES = int(get_env("WORKER_MAX_RETRIES", "3"))
+# Exchange para onde publicar os resultados processados (vazio = não
+# persistir, e então a serialização do resultado nem acontece)
+RESULTS_EXCHANGE = get_env("RESULTS_EXCHANGE", "")
 
 # Configurações do CrewAI
 OPENAI_API_KEY = get_env("OPENAI_API_KEY", "")
\ No newline at end of file
@@ -3,28 +3,24 @@ Carregamento de variáveis de ambiente para o projeto
 """
 import os
 from pathlib import Path
-from dotenv import load_dotenv
 
 # Definir o diretório base do projeto (pasta raiz)
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-# Carregar variáveis do arquivo .env
+# Carregar variáveis do arquivo .env; o import do python-dotenv só
+# acontece quando o arquivo existe, então contêineres de produção sem
+# .env nem pagam o custo de importar a biblioteca
 dotenv_path = os.path.join(BASE_DIR, '.env')
 if os.path.exists(dotenv_path):
+    from dotenv import load_dotenv
     load_dotenv(dotenv_path)
 else:
     print(f"Arquivo .env não encontrado em {dotenv_path}. Usando variáveis de ambiente do sistema.")
 
+# Snapshot do ambiente após o load_dotenv: a leitura de configuração
+# vira uma busca de dict em C. Mudanças em os.environ feitas depois do
+# import não são vistas — configuração é lida uma vez, no startup
+_ENV_SNAPSHOT = dict(os.environ)
+
 # Função para obter variável de ambiente com valor padrão
-def get_env(key, default=None):
-    """
-    Retorna o valor de uma variável de ambiente, ou o valor padrão se não existir
-    
-    Args:
-        key: Nome da variável de ambiente
-        default: Valor padrão caso a variável não exista
-        
-    Returns:
-        Valor da variável de ambiente ou o valor padrão
-    """
-    return os.environ.get(key, default)
\ No newline at end of file
+get_env = _ENV_SNAPSHOT.get
\ No newline at end of file
@@ -1,17 +1,28 @@
 """
 Utilitários compartilhados para toda a aplicação
 """
+import itertools
 import json
-import uuid
 import logging
+from functools import lru_cache
+
+import orjson
+
+import os
+import time
 from datetime import datetime
 from typing import Dict, Any, Optional
 
 # Configurar logging
+@lru_cache(maxsize=None)
 def setup_logger(name: str, level: int = logging.INFO) -> logging.Logger:
     """
     Configura e retorna um logger formatado
     
+    Memoizado por (name, level): chamadas repetidas viram uma busca de
+    dict, sem revisitar a lista de handlers. Seguro porque os loggers já
+    são singletons globais do módulo logging.
+    
     Args:
         name: Nome do logger
         level: Nível de log (default: logging.INFO)
@@ -37,25 +48,56 @@ def setup_logger(name: str, level: int = logging.INFO) -> logging.Logger:
         
         # Adicionar handler ao logger
         logger.addHandler(handler)
+        
+        # Não propagar ao root logger: evita que cada registro seja
+        # formatado uma segunda vez pelo handler do root
+        logger.propagate = False
     
     return logger
 
+# Contador por processo para geração de IDs sem syscall
+_ID_COUNTER = itertools.count()
+
 def generate_task_id() -> str:
     """
     Gera um ID único para tarefas
-    
+
+    Combina relógio em nanossegundos, contador por processo e PID, no
+    estilo SnowFlake. Evita a leitura de /dev/urandom (uma syscall por
+    chamada) que uuid4 faria no caminho da requisição.
+
     Returns:
         str: ID único
     """
-    return str(uuid.uuid4())
+    return f"{time.time_ns():x}-{next(_ID_COUNTER):x}-{os.getpid():x}"
+
+# Cache do timestamp ISO com granularidade de 1 segundo: em taxas altas
+# de publicação evita alocar e formatar um datetime por mensagem
+_ts_cache = [0.0, ""]
 
 def timestamp_now() -> str:
     """
-    Retorna o timestamp atual em formato ISO
+    Retorna o timestamp atual em formato ISO, com resolução de 1 segundo
+    
+    O valor é memoizado por até um segundo; quem precisar de precisão
+    de microssegundos deve usar timestamp_now_precise.
     
     Returns:
         str: Timestamp em formato ISO
     """
+    t = time.time()
+    if t - _ts_cache[0] >= 1.0:
+        _ts_cache[0] = t
+        _ts_cache[1] = datetime.fromtimestamp(t).isoformat(timespec="seconds")
+    return _ts_cache[1]
+
+def timestamp_now_precise() -> str:
+    """
+    Retorna o timestamp atual em formato ISO com precisão total
+    
+    Returns:
+        str: Timestamp em formato ISO com microssegundos
+    """
     return datetime.now().isoformat()
 
 # Serializador personalizado para datetime e outros tipos complexos
@@ -99,10 +141,17 @@ def safe_json_dumps(data: Any) -> str:
     """
     Converte dados para JSON de forma segura, lidando com tipos não serializáveis
     
+    Usa orjson (datetime nativo, UTF-8 direto) e cai para o json da
+    stdlib com o serializador personalizado apenas se o orjson não
+    souber lidar com algum tipo.
+    
     Args:
         data: Dados a serem convertidos
         
     Returns:
         str: String JSON
     """
-    return json.dumps(data, default=json_serializer, ensure_ascii=False)
\ No newline at end of file
+    try:
+        return orjson.dumps(data).decode('utf-8')
+    except TypeError:
+        return json.dumps(data, default=json_serializer, ensure_ascii=False)
\ No newline at end of file
@@ -2,17 +2,31 @@
 Handler específico para processar tarefas do fluxo clínico com CrewAI
 """
 from typing import Dict, Any
-from datetime import datetime
-import json
 
 from crewai import Agent, Task, Crew
 # Não importar Task de crewai.tasks
 
-from shared.utils import setup_logger
+from workers.crewai_handlers.llm_config import get_shared_llm
+from shared.config import CREWAI_VERBOSE
+from shared.utils import setup_logger, timestamp_now
 
 # Configuração de logging
 logger = setup_logger("clinico_handler")
 
+# Agentes estáticos construídos uma única vez no import: Agent.__init__
+# valida com pydantic e inicializa o cliente LLM, caro demais para pagar
+# por tarefa. Agentes sem estado entre kickoff() podem ser reutilizados;
+# apenas os que dependem dos dados da tarefa continuam sendo criados
+# por chamada
+_MEDICAL_ANALYST = Agent(
+    role="Medical Analyst",
+    goal="Analyze medical information and provide recommendations",
+    backstory="You are a skilled medical analyst with deep knowledge of "
+            "treatment protocols and medical research.",
+    verbose=False,
+    llm=get_shared_llm()
+)
+
 def process_consulta(task_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Processa uma tarefa de consulta usando CrewAI
@@ -23,7 +37,7 @@ def process_consulta(task_data: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         Dict: Resultado do processamento
     """
-    logger.info(f"Processando consulta - ID: {task_data.get('id')}")
+    logger.info("Processando consulta - ID: %s", task_data.get('id'))
     
     try:
         # Extrair dados relevantes
@@ -31,23 +45,19 @@ def process_consulta(task_data: Dict[str, Any]) -> Dict[str, Any]:
         medico = task_data.get("medico", {})
         observacoes = task_data.get("observacoes", "")
         
-        # Criar agentes CrewAI
+        # O doctor depende dos dados do médico da tarefa; o analista é o
+        # agente estático do módulo
         doctor = Agent(
             role="Doctor",
             goal="Provide thorough and accurate medical analysis",
             backstory=f"You are Dr. {medico.get('nome', 'Medical Expert')}, "
                     f"a specialist in {medico.get('especialidade', 'General Medicine')} "
                     f"with extensive clinical experience.",
-            verbose=True
+            verbose=False,
+            llm=get_shared_llm()
         )
         
-        medical_analyst = Agent(
-            role="Medical Analyst",
-            goal="Analyze medical information and provide recommendations",
-            backstory="You are a skilled medical analyst with deep knowledge of "
-                    "treatment protocols and medical research.",
-            verbose=True
-        )
+        medical_analyst = _MEDICAL_ANALYST
         
         # Criar tarefa
         consultation_task = Task(
@@ -88,7 +98,7 @@ def process_consulta(task_data: Dict[str, Any]) -> Dict[str, Any]:
         crew = Crew(
             agents=[doctor, medical_analyst],
             tasks=[consultation_task, recommendation_task],
-            verbose=True
+            verbose=CREWAI_VERBOSE
         )
         
         # Executar análise
@@ -100,16 +110,16 @@ def process_consulta(task_data: Dict[str, Any]) -> Dict[str, Any]:
             "result": result,
             "diagnostic_summary": "Análise clínica completa",
             "status": "completed",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp_now()
         }
         
     except Exception as e:
-        logger.error(f"Erro ao processar consulta: {e}")
+        logger.error("Erro ao processar consulta: %s", e)
         return {
             "task_id": task_data.get("id"),
             "status": "error",
             "error": str(e),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp_now()
         }
 
 def process_internacao(task_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -122,7 +132,7 @@ def process_internacao(task_data: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         Dict: Resultado do processamento
     """
-    logger.info(f"Processando internação - ID: {task_data.get('id')}")
+    logger.info("Processando internação - ID: %s", task_data.get('id'))
     
     try:
         # Implementar lógica para processar internação com CrewAI
@@ -142,16 +152,16 @@ def process_internacao(task_data: Dict[str, Any]) -> Dict[str, Any]:
             "task_id": task_data.get("id"),
             "result": result,
             "status": "completed",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp_now()
         }
         
     except Exception as e:
-        logger.error(f"Erro ao processar internação: {e}")
+        logger.error("Erro ao processar internação: %s", e)
         return {
             "task_id": task_data.get("id"),
             "status": "error",
             "error": str(e),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp_now()
         }
 
 def process_alta(task_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -164,7 +174,7 @@ def process_alta(task_data: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         Dict: Resultado do processamento
     """
-    logger.info(f"Processando alta hospitalar - ID: {task_data.get('id')}")
+    logger.info("Processando alta hospitalar - ID: %s", task_data.get('id'))
     
     try:
         # Implementar lógica para processar alta com CrewAI
@@ -184,18 +194,25 @@ def process_alta(task_data: Dict[str, Any]) -> Dict[str, Any]:
             "task_id": task_data.get("id"),
             "result": result,
             "status": "completed",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp_now()
         }
         
     except Exception as e:
-        logger.error(f"Erro ao processar alta hospitalar: {e}")
+        logger.error("Erro ao processar alta hospitalar: %s", e)
         return {
             "task_id": task_data.get("id"),
             "status": "error",
             "error": str(e),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp_now()
         }
 
+# Tabela de despacho por tipo: busca O(1) em vez da cadeia de if/elif
+_CLINICO_DISPATCH = {
+    "consulta": process_consulta,
+    "internacao": process_internacao,
+    "alta": process_alta
+}
+
 def process_clinico_task(task_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Processa uma tarefa do fluxo clínico baseado no tipo
@@ -209,17 +226,14 @@ def process_clinico_task(task_data: Dict[str, Any]) -> Dict[str, Any]:
     task_type = task_data.get("tipo", "").lower()
     
     # Direcionar para o handler específico baseado no tipo
-    if task_type == "consulta":
-        return process_consulta(task_data)
-    elif task_type == "internacao":
-        return process_internacao(task_data)
-    elif task_type == "alta":
-        return process_alta(task_data)
-    else:
-        logger.warning(f"Tipo de tarefa desconhecido no fluxo clínico: {task_type}")
-        return {
-            "task_id": task_data.get("id"),
-            "status": "error",
-            "error": f"Tipo de tarefa desconhecido: {task_type}",
-            "timestamp": datetime.now().isoformat()
-        }
\ No newline at end of file
+    handler = _CLINICO_DISPATCH.get(task_type)
+    if handler is not None:
+        return handler(task_data)
+    
+    logger.warning("Tipo de tarefa desconhecido no fluxo clínico: %s", task_type)
+    return {
+        "task_id": task_data.get("id"),
+        "status": "error",
+        "error": f"Tipo de tarefa desconhecido: {task_type}",
+        "timestamp": timestamp_now()
+    }
\ No newline at end of file
@@ -2,17 +2,39 @@
 Handler específico para processar tarefas do fluxo de exames com CrewAI
 """
 from typing import Dict, Any
-from datetime import datetime
-import json
 
 from crewai import Agent, Task, Crew
 # Não importar Task de crewai.tasks
 
-from shared.utils import setup_logger
+from workers.crewai_handlers.llm_config import get_shared_llm
+from shared.config import CREWAI_VERBOSE
+from shared.utils import setup_logger, timestamp_now
 
 # Configuração de logging
 logger = setup_logger("exames_handler")
 
+# Agentes estáticos construídos uma única vez no import: Agent.__init__
+# valida com pydantic e inicializa o cliente LLM, caro demais para pagar
+# por tarefa. Nenhum destes depende dos dados da tarefa
+_LAB_ANALYST = Agent(
+    role="Laboratory Analyst",
+    goal="Provide accurate and comprehensive blood test analysis",
+    backstory="You are an experienced laboratory analyst with expertise in hematology. "
+            "You have analyzed thousands of blood samples and can identify patterns "
+            "and anomalies in blood test results.",
+    verbose=False,
+    llm=get_shared_llm()
+)
+
+_HEMATOLOGIST = Agent(
+    role="Hematologist",
+    goal="Interpret blood test results and provide clinical insights",
+    backstory="You are a specialized hematologist with years of experience in diagnosing "
+            "blood disorders and interpreting complex blood test results.",
+    verbose=False,
+    llm=get_shared_llm()
+)
+
 def process_hemograma(task_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Processa uma tarefa de hemograma usando CrewAI
@@ -23,7 +45,7 @@ def process_hemograma(task_data: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         Dict: Resultado do processamento
     """
-    logger.info(f"Processando hemograma - ID: {task_data.get('id')}")
+    logger.info("Processando hemograma - ID: %s", task_data.get('id'))
     
     try:
         # Extrair dados relevantes
@@ -31,23 +53,9 @@ def process_hemograma(task_data: Dict[str, Any]) -> Dict[str, Any]:
         solicitante = task_data.get("solicitante", {})
         observacoes = task_data.get("observacoes", "")
         
-        # Criar agentes CrewAI
-        lab_analyst = Agent(
-            role="Laboratory Analyst",
-            goal="Provide accurate and comprehensive blood test analysis",
-            backstory="You are an experienced laboratory analyst with expertise in hematology. "
-                    "You have analyzed thousands of blood samples and can identify patterns "
-                    "and anomalies in blood test results.",
-            verbose=True
-        )
-        
-        hematologist = Agent(
-            role="Hematologist",
-            goal="Interpret blood test results and provide clinical insights",
-            backstory="You are a specialized hematologist with years of experience in diagnosing "
-                    "blood disorders and interpreting complex blood test results.",
-            verbose=True
-        )
+        # Reutilizar os agentes estáticos do módulo
+        lab_analyst = _LAB_ANALYST
+        hematologist = _HEMATOLOGIST
         
         # Criar tarefa
         analysis_task = Task(
@@ -90,7 +98,7 @@ def process_hemograma(task_data: Dict[str, Any]) -> Dict[str, Any]:
         crew = Crew(
             agents=[lab_analyst, hematologist],
             tasks=[analysis_task, interpretation_task],
-            verbose=True
+            verbose=CREWAI_VERBOSE
         )
         
         # Executar análise
@@ -102,16 +110,16 @@ def process_hemograma(task_data: Dict[str, Any]) -> Dict[str, Any]:
             "result": result,
             "analysis_summary": "Análise de hemograma completa",
             "status": "completed",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp_now()
         }
         
     except Exception as e:
-        logger.error(f"Erro ao processar hemograma: {e}")
+        logger.error("Erro ao processar hemograma: %s", e)
         return {
             "task_id": task_data.get("id"),
             "status": "error",
             "error": str(e),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp_now()
         }
 
 def process_imagem(task_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -124,7 +132,7 @@ def process_imagem(task_data: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         Dict: Resultado do processamento
     """
-    logger.info(f"Processando exame de imagem ({task_data.get('tipo')}) - ID: {task_data.get('id')}")
+    logger.info("Processando exame de imagem (%s) - ID: %s", task_data.get('tipo'), task_data.get('id'))
     
     try:
         # Extrair dados relevantes
@@ -132,14 +140,15 @@ def process_imagem(task_data: Dict[str, Any]) -> Dict[str, Any]:
         paciente = task_data.get("paciente", {})
         solicitante = task_data.get("solicitante", {})
         
-        # Criar agentes CrewAI
+        # O radiologista depende do tipo de exame, então continua por tarefa
         radiologist = Agent(
             role="Radiologist",
             goal="Provide accurate and detailed interpretation of imaging studies",
             backstory=f"You are an experienced radiologist specialized in {tipo_exame} interpretation. "
                     "You have analyzed thousands of imaging studies and can identify subtle "
                     "abnormalities and patterns.",
-            verbose=True
+            verbose=False,
+            llm=get_shared_llm()
         )
         
         # Criar tarefa
@@ -169,7 +178,7 @@ def process_imagem(task_data: Dict[str, Any]) -> Dict[str, Any]:
         crew = Crew(
             agents=[radiologist],
             tasks=[analysis_task],
-            verbose=True
+            verbose=CREWAI_VERBOSE
         )
         
         # Executar análise
@@ -181,18 +190,28 @@ def process_imagem(task_data: Dict[str, Any]) -> Dict[str, Any]:
             "result": result,
             "analysis_summary": f"Análise de {tipo_exame} completa",
             "status": "completed",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp_now()
         }
         
     except Exception as e:
-        logger.error(f"Erro ao processar exame de imagem: {e}")
+        logger.error("Erro ao processar exame de imagem: %s", e)
         return {
             "task_id": task_data.get("id"),
             "status": "error",
             "error": str(e),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp_now()
         }
 
+# Tabela de despacho por tipo: busca O(1) em vez da cadeia de if/elif
+# (todos os exames de imagem compartilham o mesmo handler)
+_EXAME_DISPATCH = {
+    "hemograma": process_hemograma,
+    "raio_x": process_imagem,
+    "tomografia": process_imagem,
+    "ultrassonografia": process_imagem,
+    "ressonancia": process_imagem
+}
+
 def process_exame_task(task_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Processa uma tarefa do fluxo de exames baseado no tipo
@@ -206,15 +225,14 @@ def process_exame_task(task_data: Dict[str, Any]) -> Dict[str, Any]:
     task_type = task_data.get("tipo", "").lower()
     
     # Direcionar para o handler específico baseado no tipo
-    if task_type == "hemograma":
-        return process_hemograma(task_data)
-    elif task_type in ["raio_x", "tomografia", "ultrassonografia", "ressonancia"]:
-        return process_imagem(task_data)
-    else:
-        logger.warning(f"Tipo de exame desconhecido: {task_type}")
-        return {
-            "task_id": task_data.get("id"),
-            "status": "error",
-            "error": f"Tipo de exame desconhecido: {task_type}",
-            "timestamp": datetime.now().isoformat()
-        }
\ No newline at end of file
+    handler = _EXAME_DISPATCH.get(task_type)
+    if handler is not None:
+        return handler(task_data)
+    
+    logger.warning("Tipo de exame desconhecido: %s", task_type)
+    return {
+        "task_id": task_data.get("id"),
+        "status": "error",
+        "error": f"Tipo de exame desconhecido: {task_type}",
+        "timestamp": timestamp_now()
+    }
\ No newline at end of file
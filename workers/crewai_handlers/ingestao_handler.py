@@ -2,17 +2,61 @@
 Handler específico para processar tarefas do fluxo de ingestão de dados com CrewAI
 """
 from typing import Dict, Any
-from datetime import datetime
-import json
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
 
 from crewai import Agent, Task, Crew
 # Não importar Task de crewai.tasks
 
-from shared.utils import setup_logger
+from workers.crewai_handlers.llm_config import get_shared_llm
+from shared.config import CREWAI_VERBOSE
+from shared.utils import setup_logger, timestamp_now
 
 # Configuração de logging
 logger = setup_logger("ingestao_handler")
 
+# Agentes estáticos construídos uma única vez no import: Agent.__init__
+# valida com pydantic e inicializa o cliente LLM, caro demais para pagar
+# por tarefa. Nenhum destes depende dos dados da tarefa
+_DATA_ANALYST = Agent(
+    role="Data Analyst",
+    goal="Analyze and transform patient data for optimal integration",
+    backstory="You are a skilled data analyst specializing in healthcare data. "
+            "You have experience in data transformation, quality assurance, "
+            "and integration of diverse clinical datasets.",
+    verbose=False,
+    llm=get_shared_llm()
+)
+
+_DATA_QUALITY_SPECIALIST = Agent(
+    role="Data Quality Specialist",
+    goal="Ensure high-quality data through validation and normalization",
+    backstory="You are an expert in healthcare data quality with experience in "
+            "validating clinical data, ensuring compliance with standards, and "
+            "implementing data governance practices.",
+    verbose=False,
+    llm=get_shared_llm()
+)
+
+_DATA_SPECIALIST = Agent(
+    role="Healthcare Data Specialist",
+    goal="Process and validate physician data for system integration",
+    backstory="You are a specialist in healthcare provider data with expertise "
+            "in processing physician credentials, specialties, and practice information.",
+    verbose=False,
+    llm=get_shared_llm()
+)
+
+_LAB_DATA_SPECIALIST = Agent(
+    role="Laboratory Data Specialist",
+    goal="Process and standardize diagnostic test data",
+    backstory="You are a specialist in laboratory and diagnostic test data "
+            "with expertise in coding systems, reference ranges, and result interpretation.",
+    verbose=False,
+    llm=get_shared_llm()
+)
+
 def process_carga_pacientes(task_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Processa uma tarefa de ingestão de dados de pacientes usando CrewAI
@@ -32,24 +76,9 @@ def process_carga_pacientes(task_data: Dict[str, Any]) -> Dict[str, Any]:
         quantidade = task_data.get("quantidade_registros", "N/A")
         metadados = task_data.get("metadados", {})
         
-        # Criar agentes CrewAI
-        data_analyst = Agent(
-            role="Data Analyst",
-            goal="Analyze and transform patient data for optimal integration",
-            backstory="You are a skilled data analyst specializing in healthcare data. "
-                    "You have experience in data transformation, quality assurance, "
-                    "and integration of diverse clinical datasets.",
-            verbose=True
-        )
-        
-        data_quality_specialist = Agent(
-            role="Data Quality Specialist",
-            goal="Ensure high-quality data through validation and normalization",
-            backstory="You are an expert in healthcare data quality with experience in "
-                    "validating clinical data, ensuring compliance with standards, and "
-                    "implementing data governance practices.",
-            verbose=True
-        )
+        # Reutilizar os agentes estáticos do módulo
+        data_analyst = _DATA_ANALYST
+        data_quality_specialist = _DATA_QUALITY_SPECIALIST
         
         # Criar tarefa
         analysis_task = Task(
@@ -59,7 +88,7 @@ def process_carga_pacientes(task_data: Dict[str, Any]) -> Dict[str, Any]:
             Data source: {origem}
             Format: {formato}
             Record count: {quantidade}
-            Metadata: {json.dumps(metadados, indent=2) if metadados else "None provided"}
+            Metadata: {orjson.dumps(metadados).decode() if metadados else "None"}
             
             Your task is to:
             1. Design a data processing pipeline for this patient dataset
@@ -92,7 +121,7 @@ def process_carga_pacientes(task_data: Dict[str, Any]) -> Dict[str, Any]:
         crew = Crew(
             agents=[data_analyst, data_quality_specialist],
             tasks=[analysis_task, quality_task],
-            verbose=True
+            verbose=CREWAI_VERBOSE
         )
         
         # Executar análise
@@ -104,7 +133,7 @@ def process_carga_pacientes(task_data: Dict[str, Any]) -> Dict[str, Any]:
             "result": result,
             "ingestao_summary": "Análise de ingestão de dados de pacientes completa",
             "status": "completed",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp_now()
         }
         
     except Exception as e:
@@ -113,7 +142,7 @@ def process_carga_pacientes(task_data: Dict[str, Any]) -> Dict[str, Any]:
             "task_id": task_data.get("id"),
             "status": "error",
             "error": str(e),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp_now()
         }
 
 def process_carga_medicos(task_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -135,14 +164,8 @@ def process_carga_medicos(task_data: Dict[str, Any]) -> Dict[str, Any]:
         quantidade = task_data.get("quantidade_registros", "N/A")
         metadados = task_data.get("metadados", {})
         
-        # Criar agentes CrewAI
-        data_specialist = Agent(
-            role="Healthcare Data Specialist",
-            goal="Process and validate physician data for system integration",
-            backstory="You are a specialist in healthcare provider data with expertise "
-                    "in processing physician credentials, specialties, and practice information.",
-            verbose=True
-        )
+        # Reutilizar o agente estático do módulo
+        data_specialist = _DATA_SPECIALIST
         
         # Criar tarefa
         analysis_task = Task(
@@ -152,7 +175,7 @@ def process_carga_medicos(task_data: Dict[str, Any]) -> Dict[str, Any]:
             Data source: {origem}
             Format: {formato}
             Record count: {quantidade}
-            Metadata: {json.dumps(metadados, indent=2) if metadados else "None provided"}
+            Metadata: {orjson.dumps(metadados).decode() if metadados else "None"}
             
             Your task is to:
             1. Design a data processing pipeline for physician information
@@ -170,7 +193,7 @@ def process_carga_medicos(task_data: Dict[str, Any]) -> Dict[str, Any]:
         crew = Crew(
             agents=[data_specialist],
             tasks=[analysis_task],
-            verbose=True
+            verbose=CREWAI_VERBOSE
         )
         
         # Executar análise
@@ -181,7 +204,7 @@ def process_carga_medicos(task_data: Dict[str, Any]) -> Dict[str, Any]:
             "task_id": task_data.get("id"),
             "result": result,
             "status": "completed",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp_now()
         }
         
     except Exception as e:
@@ -190,7 +213,7 @@ def process_carga_medicos(task_data: Dict[str, Any]) -> Dict[str, Any]:
             "task_id": task_data.get("id"),
             "status": "error",
             "error": str(e),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp_now()
         }
 
 def process_carga_exames(task_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -204,24 +227,29 @@ def process_carga_exames(task_data: Dict[str, Any]) -> Dict[str, Any]:
         Dict: Resultado do processamento
     """
     logger.info(f"Processando carga de exames - ID: {task_data.get('id')}")
-    
+
     try:
-        # Criar agentes CrewAI
-        lab_data_specialist = Agent(
-            role="Laboratory Data Specialist",
-            goal="Process and standardize diagnostic test data",
-            backstory="You are a specialist in laboratory and diagnostic test data "
-                    "with expertise in coding systems, reference ranges, and result interpretation.",
-            verbose=True
-        )
-        
+        # Extrair apenas os campos relevantes: serializar o task_data
+        # inteiro no prompt paga CPU e tokens por id, timestamp e campos
+        # de roteamento que não ajudam a análise
+        origem = task_data.get("origem", "")
+        formato = task_data.get("formato", "")
+        quantidade = task_data.get("quantidade_registros", "N/A")
+        metadados = task_data.get("metadados", {})
+
+        # Reutilizar o agente estático do módulo
+        lab_data_specialist = _LAB_DATA_SPECIALIST
+
         # Criar tarefa
         analysis_task = Task(
             description=f"""
             Analyze the following diagnostic test data ingestion task:
-            
-            {json.dumps(task_data, indent=2)}
-            
+
+            Data source: {origem}
+            Format: {formato}
+            Record count: {quantidade}
+            Metadata: {orjson.dumps(metadados).decode() if metadados else "None"}
+
             Your task is to:
             1. Design a data processing pipeline for laboratory and diagnostic test data
             2. Outline standardization of test codes and result formats
@@ -238,7 +266,7 @@ def process_carga_exames(task_data: Dict[str, Any]) -> Dict[str, Any]:
         crew = Crew(
             agents=[lab_data_specialist],
             tasks=[analysis_task],
-            verbose=True
+            verbose=CREWAI_VERBOSE
         )
         
         # Executar análise
@@ -249,7 +277,7 @@ def process_carga_exames(task_data: Dict[str, Any]) -> Dict[str, Any]:
             "task_id": task_data.get("id"),
             "result": result,
             "status": "completed",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp_now()
         }
         
     except Exception as e:
@@ -258,13 +286,155 @@ def process_carga_exames(task_data: Dict[str, Any]) -> Dict[str, Any]:
             "task_id": task_data.get("id"),
             "status": "error",
             "error": str(e),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp_now()
         }
 
+# Tabela de despacho por tipo: busca O(1) em vez da cadeia de if/elif
+_INGESTAO_DISPATCH = {
+    "carga_pacientes": process_carga_pacientes,
+    "carga_medicos": process_carga_medicos,
+    "carga_exames": process_carga_exames
+}
+
+# Limite de kickoffs simultâneos no fan-out de lotes
+_BATCH_MAX_WORKERS = 16
+
+# Tipos elegíveis para a agregação contínua do worker
+BATCH_TIPOS = frozenset(_INGESTAO_DISPATCH)
+
+# Agente responsável por cada tipo no caminho agregado
+_BATCH_AGENTS = {
+    "carga_pacientes": _DATA_ANALYST,
+    "carga_medicos": _DATA_SPECIALIST,
+    "carga_exames": _LAB_DATA_SPECIALIST
+}
+
+def process_ingestao_batch(tipo: str, tasks: list) -> list:
+    """
+    Processa várias tarefas do mesmo tipo em um único kickoff
+
+    Caminho usado pelo agregador do worker (estilo continuous batching):
+    mensagens do mesmo tipo que chegaram na mesma janela viram um único
+    prompt multi-registro e pagam um kickoff só, em vez de um Crew por
+    mensagem.
+
+    Args:
+        tipo: Tipo de ingestão comum a todas as tarefas
+        tasks: Lista de task_data do lote
+
+    Returns:
+        list: Um resultado por tarefa, na mesma ordem da entrada
+    """
+    logger.info(f"Processando lote agregado de {len(tasks)} tarefas (tipo: {tipo})")
+
+    agent = _BATCH_AGENTS.get(tipo, _DATA_ANALYST)
+
+    registros = "\n\n".join(
+        f"            Record {i}:\n"
+        f"            Data source: {t.get('origem', '')}\n"
+        f"            Format: {t.get('formato', '')}\n"
+        f"            Record count: {t.get('quantidade_registros', 'N/A')}"
+        for i, t in enumerate(tasks, 1)
+    )
+
+    try:
+        analysis_task = Task(
+            description=f"""
+            Analyze the following batch of {len(tasks)} data ingestion tasks of type "{tipo}":
+
+{registros}
+
+            Your task is to:
+            1. Design a data processing pipeline covering all the records above
+            2. Identify key fields and data elements to extract
+            3. Suggest transformation rules and normalization procedures
+            4. Recommend validation checks for this kind of data
+            5. Note any record-specific concerns, referencing records by number
+
+            Be thorough and precise in your analysis.
+            """,
+            agent=agent
+        )
+
+        crew = Crew(
+            agents=[agent],
+            tasks=[analysis_task],
+            verbose=CREWAI_VERBOSE
+        )
+
+        result = crew.kickoff()
+
+        timestamp = timestamp_now()
+        return [
+            {
+                "task_id": t.get("id"),
+                "result": result,
+                "status": "completed",
+                "batch_size": len(tasks),
+                "batch_index": i,
+                "timestamp": timestamp
+            }
+            for i, t in enumerate(tasks, 1)
+        ]
+
+    except Exception as e:
+        logger.error(f"Erro ao processar lote agregado (tipo: {tipo}): {e}")
+        timestamp = timestamp_now()
+        return [
+            {
+                "task_id": t.get("id"),
+                "status": "error",
+                "error": str(e),
+                "timestamp": timestamp
+            }
+            for t in tasks
+        ]
+
+def _process_lote(handler, task_data: Dict[str, Any], registros: list) -> Dict[str, Any]:
+    """
+    Processa um payload em lote, um kickoff por registro em paralelo
+
+    Cada registro vira uma subtarefa independente processada pelo mesmo
+    handler; as chamadas rodam em um pool de threads limitado, então as
+    latências de LLM dos registros se sobrepõem em vez de virarem um
+    único prompt monolítico.
+
+    Args:
+        handler: Handler do tipo de ingestão
+        task_data: Dados da tarefa original
+        registros: Lista de registros do lote
+
+    Returns:
+        Dict: Resultado agregado com a lista de resultados por registro
+    """
+    base = {k: v for k, v in task_data.items() if k != "registros"}
+    task_id = task_data.get("id")
+
+    subtarefas = []
+    for i, registro in enumerate(registros):
+        sub = dict(base)
+        sub["id"] = f"{task_id}-{i}"
+        sub["registro"] = registro
+        subtarefas.append(sub)
+
+    with ThreadPoolExecutor(max_workers=min(_BATCH_MAX_WORKERS, len(subtarefas))) as pool:
+        resultados = list(pool.map(handler, subtarefas))
+
+    return {
+        "task_id": task_id,
+        "status": "completed",
+        "resultados": resultados,
+        "quantidade_registros": len(registros),
+        "timestamp": timestamp_now()
+    }
+
 def process_ingestao_task(task_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Processa uma tarefa do fluxo de ingestão baseado no tipo
     
+    Payloads em lote (campo "registros" com uma lista) são distribuídos
+    em um fan-out paralelo, um kickoff por registro.
+    
     Args:
         task_data: Dados da tarefa recebida
         
@@ -274,17 +444,18 @@ def process_ingestao_task(task_data: Dict[str, Any]) -> Dict[str, Any]:
     task_type = task_data.get("tipo", "").lower()
     
     # Direcionar para o handler específico baseado no tipo
-    if task_type == "carga_pacientes":
-        return process_carga_pacientes(task_data)
-    elif task_type == "carga_medicos":
-        return process_carga_medicos(task_data)
-    elif task_type == "carga_exames":
-        return process_carga_exames(task_data)
-    else:
+    handler = _INGESTAO_DISPATCH.get(task_type)
+    if handler is None:
         logger.warning(f"Tipo de ingestão desconhecido: {task_type}")
         return {
             "task_id": task_data.get("id"),
             "status": "error",
             "error": f"Tipo de ingestão desconhecido: {task_type}",
-            "timestamp": datetime.now().isoformat()
-        }
\ No newline at end of file
+            "timestamp": timestamp_now()
+        }
+    
+    registros = task_data.get("registros")
+    if isinstance(registros, list) and registros:
+        return _process_lote(handler, task_data, registros)
+    
+    return handler(task_data)
\ No newline at end of file
@@ -0,0 +1,54 @@
+"""
+Configuração do LLM compartilhado pelos handlers CrewAI
+
+Um único cliente ChatOpenAI por processo, reutilizado por todos os
+agentes: evita um handshake de cliente por Agent e permite ligar o
+prompt caching do provedor. As backstories dos agentes são estáticas e
+longas; com cache_control o provedor reutiliza esse prefixo entre
+chamadas (desconto na tarifa e TTFT menor), enquanto a descrição
+dinâmica da Task continua fora do cache.
+"""
+from typing import Optional
+
+import httpx
+from langchain_openai import ChatOpenAI
+
+from shared.config import OPENAI_MODEL_NAME, PROMPT_CACHE_ENABLED
+from shared.utils import setup_logger
+
+# Configuração de logging
+logger = setup_logger("llm_config")
+
+# Cliente único por processo
+_shared_llm: Optional[ChatOpenAI] = None
+
+
+def get_shared_llm() -> ChatOpenAI:
+    """
+    Obtém o cliente LLM compartilhado do processo
+
+    Returns:
+        ChatOpenAI: Cliente único, com cache_control quando habilitado
+    """
+    global _shared_llm
+    if _shared_llm is None:
+        model_kwargs = {}
+        if PROMPT_CACHE_ENABLED:
+            # Marca o prefixo estático (system/backstory) como cacheável
+            # no provedor; o TTL é do provedor (ex.: ~5min na Anthropic)
+            model_kwargs["extra_body"] = {"cache_control": {"type": "ephemeral"}}
+            logger.info("Prompt caching habilitado no LLM compartilhado")
+        # Cliente HTTP único e multiplexado (HTTP/2): todos os agentes
+        # reusam a mesma conexão TLS em vez de pagar handshake e warmup
+        # de pool de conexões por kickoff
+        http_client = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=100)
+        )
+        _shared_llm = ChatOpenAI(
+            model=OPENAI_MODEL_NAME,
+            temperature=0.7,
+            model_kwargs=model_kwargs,
+            http_client=http_client
+        )
+    return _shared_llm
@@ -2,17 +2,88 @@
 Handler específico para processar tarefas do fluxo OPME com CrewAI
 """
 from typing import Dict, Any, List
-from datetime import datetime
-import json
 
 from crewai import Agent, Task, Crew
 # Não importar Task de crewai.tasks
 
-from shared.utils import setup_logger
+from workers.crewai_handlers.llm_config import get_shared_llm
+from shared.config import CREWAI_VERBOSE
+from shared.utils import setup_logger, timestamp_now
 
 # Configuração de logging
 logger = setup_logger("opme_handler")
 
+def _prompt_fields(dados: Dict[str, Any]) -> str:
+    """
+    Formata os campos escalares de primeiro nível para uso em prompts
+
+    O payload de material é livre, então o recorte é estrutural: apenas
+    campos simples entram no prompt, em vez de serializar o dict inteiro
+    (json.dumps com indent) com estruturas aninhadas que só gastam tokens.
+    """
+    return "\n            ".join(
+        f"{campo}: {valor}" for campo, valor in dados.items()
+        if isinstance(valor, (str, int, float, bool))
+    )
+
+# Agentes estáticos construídos uma única vez no import: Agent.__init__
+# valida com pydantic e inicializa o cliente LLM, caro demais para pagar
+# por tarefa. Nenhum destes depende dos dados da tarefa
+_ORTHOPEDIC_SPECIALIST = Agent(
+    role="Orthopedic Specialist",
+    goal="Evaluate prosthetic requirements and provide clinical recommendations",
+    backstory="You are a highly experienced orthopedic surgeon specializing in "
+            "joint replacements and prosthetic selection. You have performed "
+            "hundreds of implant surgeries and understand the critical factors "
+            "in prosthetic selection.",
+    verbose=False,
+    llm=get_shared_llm()
+)
+
+_MATERIAL_ANALYST = Agent(
+    role="Medical Materials Analyst",
+    goal="Analyze prosthetic materials and ensure optimal selection",
+    backstory="You are a specialist in medical materials with expertise in "
+            "biocompatibility, durability, and functional characteristics of "
+            "various prosthetic options.",
+    verbose=False,
+    llm=get_shared_llm()
+)
+
+_MATERIAL_SPECIALIST = Agent(
+    role="Medical Supplies Specialist",
+    goal="Evaluate special medical materials and ensure appropriate selection",
+    backstory="You are a specialist in medical supplies and special materials "
+            "with extensive knowledge of surgical consumables, implantable "
+            "devices, and specialized medical equipment.",
+    verbose=False,
+    llm=get_shared_llm()
+)
+
+# Template compilado uma vez no import: por chamada resta um único
+# str.format, em vez de re-montar o f-string multilinha inteiro
+_PROTESE_TPL = """
+            Analyze the following prosthetic request:
+
+            Patient: {nome}, ID: {pid}
+            Age: {idade}
+
+            Surgeon: {cirurgiao}, Specialty: {especialidade}
+
+            Procedure: {procedimento}
+
+            Requested items:
+            {itens}
+
+            Your task is to:
+            1. Evaluate the appropriateness of the requested prosthetics for the procedure
+            2. Discuss key considerations for this type of prosthetic
+            3. Identify potential alternatives or complements if applicable
+            4. Explain the expected outcomes and lifespan of the requested implants
+
+            Be thorough and precise in your analysis.
+            """
+
 def process_protese(task_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Processa uma tarefa de prótese usando CrewAI
@@ -32,56 +103,30 @@ def process_protese(task_data: Dict[str, Any]) -> Dict[str, Any]:
         procedimento = task_data.get("procedimento", "")
         itens = task_data.get("itens", [])
         
-        # Criar string de itens para processamento
-        itens_str = ""
-        for i, item in enumerate(itens, 1):
-            itens_str += f"{i}. Código: {item.get('codigo', 'N/A')}, "
-            itens_str += f"Descrição: {item.get('descricao', 'N/A')}, "
-            itens_str += f"Quantidade: {item.get('quantidade', 1)}\n"
-        
-        # Criar agentes CrewAI
-        orthopedic_specialist = Agent(
-            role="Orthopedic Specialist",
-            goal="Evaluate prosthetic requirements and provide clinical recommendations",
-            backstory="You are a highly experienced orthopedic surgeon specializing in "
-                    "joint replacements and prosthetic selection. You have performed "
-                    "hundreds of implant surgeries and understand the critical factors "
-                    "in prosthetic selection.",
-            verbose=True
+        # String de itens em um único join (sem += de strings em laço,
+        # que realoca o buffer a cada concatenação)
+        itens_str = "\n".join(
+            f"{i}. Código: {item.get('codigo', 'N/A')}, "
+            f"Descrição: {item.get('descricao', 'N/A')}, "
+            f"Quantidade: {item.get('quantidade', 1)}"
+            for i, item in enumerate(itens, 1)
         )
-        
-        material_analyst = Agent(
-            role="Medical Materials Analyst",
-            goal="Analyze prosthetic materials and ensure optimal selection",
-            backstory="You are a specialist in medical materials with expertise in "
-                    "biocompatibility, durability, and functional characteristics of "
-                    "various prosthetic options.",
-            verbose=True
-        )
-        
-        # Criar tarefa
+
+        # Reutilizar os agentes estáticos do módulo
+        orthopedic_specialist = _ORTHOPEDIC_SPECIALIST
+        material_analyst = _MATERIAL_ANALYST
+
+        # Criar tarefa (template do módulo + um único format)
         analysis_task = Task(
-            description=f"""
-            Analyze the following prosthetic request:
-            
-            Patient: {paciente.get('nome', 'Unknown')}, ID: {paciente.get('id', 'Unknown')}
-            Age: {paciente.get('idade', 'Not specified')}
-            
-            Surgeon: {cirurgiao.get('nome', 'Unknown')}, Specialty: {cirurgiao.get('especialidade', 'Unknown')}
-            
-            Procedure: {procedimento}
-            
-            Requested items:
-            {itens_str}
-            
-            Your task is to:
-            1. Evaluate the appropriateness of the requested prosthetics for the procedure
-            2. Discuss key considerations for this type of prosthetic
-            3. Identify potential alternatives or complements if applicable
-            4. Explain the expected outcomes and lifespan of the requested implants
-            
-            Be thorough and precise in your analysis.
-            """,
+            description=_PROTESE_TPL.format(
+                nome=paciente.get('nome', 'Unknown'),
+                pid=paciente.get('id', 'Unknown'),
+                idade=paciente.get('idade', 'Not specified'),
+                cirurgiao=cirurgiao.get('nome', 'Unknown'),
+                especialidade=cirurgiao.get('especialidade', 'Unknown'),
+                procedimento=procedimento,
+                itens=itens_str
+            ),
             agent=orthopedic_specialist
         )
         
@@ -104,7 +149,7 @@ def process_protese(task_data: Dict[str, Any]) -> Dict[str, Any]:
         crew = Crew(
             agents=[orthopedic_specialist, material_analyst],
             tasks=[analysis_task, materials_task],
-            verbose=True
+            verbose=CREWAI_VERBOSE
         )
         
         # Executar análise
@@ -116,7 +161,7 @@ def process_protese(task_data: Dict[str, Any]) -> Dict[str, Any]:
             "result": result,
             "analysis_summary": "Análise de prótese completa",
             "status": "completed",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp_now()
         }
         
     except Exception as e:
@@ -125,7 +170,7 @@ def process_protese(task_data: Dict[str, Any]) -> Dict[str, Any]:
             "task_id": task_data.get("id"),
             "status": "error",
             "error": str(e),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp_now()
         }
 
 def process_material(task_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -144,23 +189,16 @@ def process_material(task_data: Dict[str, Any]) -> Dict[str, Any]:
         # Extrair dados relevantes
         dados = task_data.get("dados", {})
         
-        # Criar agentes CrewAI
-        material_specialist = Agent(
-            role="Medical Supplies Specialist",
-            goal="Evaluate special medical materials and ensure appropriate selection",
-            backstory="You are a specialist in medical supplies and special materials "
-                    "with extensive knowledge of surgical consumables, implantable "
-                    "devices, and specialized medical equipment.",
-            verbose=True
-        )
+        # Reutilizar o agente estático do módulo
+        material_specialist = _MATERIAL_SPECIALIST
         
         # Criar tarefa
         analysis_task = Task(
             description=f"""
             Analyze the following special material request:
-            
-            {json.dumps(dados, indent=2)}
-            
+
+            {_prompt_fields(dados)}
+
             Your task is to:
             1. Evaluate the appropriateness of the requested materials
             2. Discuss specifications and quality considerations
@@ -176,7 +214,7 @@ def process_material(task_data: Dict[str, Any]) -> Dict[str, Any]:
         crew = Crew(
             agents=[material_specialist],
             tasks=[analysis_task],
-            verbose=True
+            verbose=CREWAI_VERBOSE
         )
         
         # Executar análise
@@ -187,7 +225,7 @@ def process_material(task_data: Dict[str, Any]) -> Dict[str, Any]:
             "task_id": task_data.get("id"),
             "result": result,
             "status": "completed",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp_now()
         }
         
     except Exception as e:
@@ -196,40 +234,57 @@ def process_material(task_data: Dict[str, Any]) -> Dict[str, Any]:
             "task_id": task_data.get("id"),
             "status": "error",
             "error": str(e),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": timestamp_now()
         }
 
+def process_orgao(task_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Processa uma tarefa de órgão (transplante)
+
+    Handler para órgãos seria implementado aqui.
+
+    Args:
+        task_data: Dados da tarefa recebida
+
+    Returns:
+        Dict: Resultado do processamento
+    """
+    logger.info(f"Processando solicitação de órgão - ID: {task_data.get('id')}")
+    return {
+        "task_id": task_data.get("id"),
+        "status": "completed",
+        "result": "Análise de solicitação de órgão para transplante",
+        "timestamp": timestamp_now()
+    }
+
+# Tabela de despacho por tipo: busca O(1) em vez da cadeia de if/elif
+_OPME_DISPATCH = {
+    "protese": process_protese,
+    "material": process_material,
+    "orgao": process_orgao
+}
+
 def process_opme_task(task_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Processa uma tarefa do fluxo OPME baseado no tipo
-    
+
     Args:
         task_data: Dados da tarefa recebida
-        
+
     Returns:
         Dict: Resultado do processamento
     """
     task_type = task_data.get("tipo", "").lower()
-    
+
     # Direcionar para o handler específico baseado no tipo
-    if task_type == "protese":
-        return process_protese(task_data)
-    elif task_type == "material":
-        return process_material(task_data)
-    elif task_type == "orgao":
-        # Handler para órgãos (transplantes) seria implementado aqui
-        logger.info(f"Processando solicitação de órgão - ID: {task_data.get('id')}")
-        return {
-            "task_id": task_data.get("id"),
-            "status": "completed",
-            "result": "Análise de solicitação de órgão para transplante",
-            "timestamp": datetime.now().isoformat()
-        }
-    else:
+    handler = _OPME_DISPATCH.get(task_type)
+    if handler is None:
         logger.warning(f"Tipo de OPME desconhecido: {task_type}")
         return {
             "task_id": task_data.get("id"),
             "status": "error",
             "error": f"Tipo de OPME desconhecido: {task_type}",
-            "timestamp": datetime.now().isoformat()
-        }
\ No newline at end of file
+            "timestamp": timestamp_now()
+        }
+
+    return handler(task_data)
\ No newline at end of file
@@ -0,0 +1,104 @@
+"""
+Cache de resultados de processamento apoiado em Redis
+
+Cada kickoff() do CrewAI custa segundos de latência de LLM; entregas
+repetidas (retries com requeue=True, reenvios do cliente) do mesmo
+payload não precisam pagar esse custo de novo. A chave canoniza o JSON
+da tarefa (sort_keys) e inclui vhost e tipo; o resultado fica no Redis
+com TTL.
+
+O cache é opcional: sem REDIS_URL configurado, ou sem a biblioteca
+redis instalada, os workers seguem funcionando sem cache.
+"""
+import hashlib
+from typing import Any, Dict, Optional
+
+import orjson
+
+from shared.config import REDIS_URL, RESULT_CACHE_TTL
+from shared.utils import setup_logger, json_serializer
+
+# Configuração de logging
+logger = setup_logger("result_cache")
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Cliente por processo (cada worker_process cria o seu após o fork)
+_client = None
+_disabled = False
+
+
+def _get_client():
+    """Obtém (criando se necessário) o cliente Redis do processo"""
+    global _client, _disabled
+    if _disabled or not REDIS_URL or redis is None:
+        return None
+    if _client is None:
+        try:
+            _client = redis.Redis.from_url(REDIS_URL)
+            _client.ping()
+            logger.info("Cache de resultados conectado ao Redis")
+        except Exception as e:
+            logger.warning("Cache de resultados indisponível: %s", e)
+            _client = None
+            _disabled = True
+    return _client
+
+
+def cache_key(vhost: str, task_data: Dict[str, Any]) -> str:
+    """
+    Monta a chave de cache canônica de uma tarefa
+
+    Args:
+        vhost: Virtual host da mensagem
+        task_data: Dados da tarefa
+
+    Returns:
+        str: Chave determinística (sha256 do payload canonizado)
+    """
+    task_type = task_data.get("tipo", "")
+    payload = orjson.dumps(task_data, option=orjson.OPT_SORT_KEYS, default=json_serializer)
+    digest = hashlib.sha256(f"{vhost}:{task_type}:".encode() + payload).hexdigest()
+    return f"result:{digest}"
+
+
+def get(key: str) -> Optional[Dict[str, Any]]:
+    """
+    Busca um resultado no cache
+
+    Args:
+        key: Chave gerada por cache_key
+
+    Returns:
+        Optional[Dict]: Resultado armazenado, ou None em miss/erro
+    """
+    client = _get_client()
+    if client is None:
+        return None
+    try:
+        cached = client.get(key)
+        if cached is not None:
+            return orjson.loads(cached)
+    except Exception as e:
+        logger.warning("Erro ao ler do cache de resultados: %s", e)
+    return None
+
+
+def put(key: str, result: Dict[str, Any]) -> None:
+    """
+    Armazena um resultado no cache com TTL
+
+    Args:
+        key: Chave gerada por cache_key
+        result: Resultado do processamento
+    """
+    client = _get_client()
+    if client is None:
+        return
+    try:
+        client.set(key, orjson.dumps(result, default=str), ex=RESULT_CACHE_TTL)
+    except Exception as e:
+        logger.warning("Erro ao gravar no cache de resultados: %s", e)
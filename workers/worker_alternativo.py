@@ -6,297 +6,458 @@ import os
 import sys
 import time
 import logging
-import json
-import pika
+import asyncio
+import importlib
 import multiprocessing
+from multiprocessing.connection import wait as wait_for_sentinels
 import signal
-import traceback
 from datetime import datetime
 
+import aio_pika
+import orjson
+
 # Importar configurações
 from shared.config import (
     RABBITMQ_HOST, RABBITMQ_PORT, RABBITMQ_USER, RABBITMQ_PASS,
-    VIRTUAL_HOSTS, QUEUE_NAME
+    VIRTUAL_HOSTS, QUEUE_NAME, WORKER_PREFETCH_COUNT, WORKER_MAX_RETRIES,
+    RESULTS_EXCHANGE
 )
 from shared.utils import setup_logger, json_serializer
 
-# Importar handlers específicos
-from workers.crewai_handlers.clinico_handler import process_clinico_task
-from workers.crewai_handlers.exames_handler import process_exame_task
-from workers.crewai_handlers.opme_handler import process_opme_task
-from workers.crewai_handlers.ingestao_handler import process_ingestao_task
-
 # Configuração de logging
 logger = setup_logger("dramatiq_worker_simple")
 
-# Mapeamento de handlers por virtual host
-HANDLERS = {
-    "fluxo_clinico": process_clinico_task,
-    "fluxo_exames": process_exame_task,
-    "fluxo_opme": process_opme_task,
-    "ingestao_dados": process_ingestao_task
+# Módulo e função do handler de cada virtual host. Os imports de CrewAI
+# são pesados (centenas de MB de RSS), então o pai não importa nenhum
+# handler: cada processo filho importa só o do próprio vhost, pós-fork
+_HANDLER_MODULES = {
+    "fluxo_clinico": ("workers.crewai_handlers.clinico_handler", "process_clinico_task"),
+    "fluxo_exames": ("workers.crewai_handlers.exames_handler", "process_exame_task"),
+    "fluxo_opme": ("workers.crewai_handlers.opme_handler", "process_opme_task"),
+    "ingestao_dados": ("workers.crewai_handlers.ingestao_handler", "process_ingestao_task")
 }
 
-# Flag para controlar o encerramento
-should_exit = False
+# Handlers já importados neste processo
+HANDLERS = {}
+
+def _load_handler(vhost):
+    """
+    Importa (uma vez por processo) o handler de um vhost
+
+    Args:
+        vhost: Virtual host do handler
+
+    Returns:
+        function: Handler do vhost, ou None se desconhecido
+    """
+    handler = HANDLERS.get(vhost)
+    if handler is None:
+        entry = _HANDLER_MODULES.get(vhost)
+        if entry is None:
+            return None
+        module_name, func_name = entry
+        module = importlib.import_module(module_name)
+        handler = HANDLERS[vhost] = getattr(module, func_name)
+    return handler
+
+# Evento de encerramento compartilhado entre supervisor e filhos: um
+# multiprocessing.Event atravessa a fronteira de processo, então um
+# sinal recebido só pelo pai ainda derruba os filhos graciosamente
+# (um bool global mudaria apenas a cópia do pai)
+_shutdown_event = None
+
+# Lado de escrita do self-pipe do supervisor: o signal handler escreve
+# nele para acordar o wait() bloqueado nas sentinelas dos filhos
+_exit_pipe_w = None
 
 def signal_handler(sig, frame):
     """Handler para sinais de interrupção"""
-    global should_exit
     logger.info("Encerrando worker...")
-    should_exit = True
+    if _shutdown_event is not None:
+        _shutdown_event.set()
+    if _exit_pipe_w is not None:
+        try:
+            _exit_pipe_w.send(b"x")
+        except Exception:
+            pass
 
-def connect_to_rabbitmq(vhost):
+async def connect_rabbitmq(vhost):
     """
     Conecta ao RabbitMQ em um vhost específico
-    
+
     Args:
         vhost: Virtual host para conectar
-        
+
     Returns:
-        pika.BlockingConnection: Conexão com o RabbitMQ
+        aio_pika.RobustConnection: Conexão estabelecida (reconecta sozinha)
     """
-    credentials = pika.PlainCredentials(RABBITMQ_USER, RABBITMQ_PASS)
-    parameters = pika.ConnectionParameters(
+    return await aio_pika.connect_robust(
         host=RABBITMQ_HOST,
         port=RABBITMQ_PORT,
-        virtual_host=vhost,
-        credentials=credentials,
-        heartbeat=60,
-        blocked_connection_timeout=300
+        login=RABBITMQ_USER,
+        password=RABBITMQ_PASS,
+        virtualhost=vhost,
+        heartbeat=60
     )
-    
-    connection = pika.BlockingConnection(parameters)
-    return connection
 
-def process_message(vhost, body, properties):
+def process_message(vhost, handler, body, properties):
     """
-    Processa uma mensagem usando o handler adequado
-    
+    Processa uma mensagem com o handler já resolvido do vhost
+
+    O handler é fixo pela vida inteira do consumidor, então a resolução
+    acontece uma vez em consume_vhost, não a cada mensagem.
+
     Args:
-        vhost: Virtual host da mensagem
+        vhost: Virtual host da mensagem (para logs)
+        handler: Handler resolvido do vhost
         body: Corpo da mensagem
         properties: Propriedades da mensagem
-        
+
     Returns:
         Dict: Resultado do processamento
     """
     try:
-        # Converter mensagem para JSON
-        message_str = body.decode('utf-8')
-        task_data = json.loads(message_str)
-        
-        # Identificar handler baseado no vhost
-        handler = HANDLERS.get(vhost)
-        if not handler:
-            logger.error(f"Nenhum handler definido para vhost {vhost}")
-            return {
-                "status": "error",
-                "error": f"Nenhum handler definido para vhost {vhost}"
-            }
-        
+        # Converter mensagem para JSON (orjson aceita bytes direto,
+        # sem o passo de decode)
+        task_data = orjson.loads(body)
+
         # Log de início do processamento
         task_id = task_data.get("id", "unknown")
         task_type = task_data.get("tipo", "unknown")
-        logger.info(f"[{vhost}] Processando tarefa {task_id} (tipo: {task_type})")
-        
-        # Processar com CrewAI
-        start_time = time.time()
+        logger.info("[%s] Processando tarefa %s (tipo: %s)", vhost, task_id, task_type)
+
+        # Processar com CrewAI (perf_counter: relógio monotônico para
+        # intervalos; time.time pode saltar com ajustes de NTP)
+        start_time = time.perf_counter()
         result = handler(task_data)
-        elapsed_time = time.time() - start_time
-        
+        elapsed_time = time.perf_counter() - start_time
+
         # Log do resultado
-        logger.info(f"[{vhost}] Tarefa {task_id} processada em {elapsed_time:.2f} segundos")
+        logger.info("[%s] Tarefa %s processada em %.2f segundos", vhost, task_id, elapsed_time)
         return result
-        
+
     except Exception as e:
-        logger.error(f"[{vhost}] Erro ao processar mensagem: {e}")
-        logger.error(traceback.format_exc())
+        logger.exception("[%s] Erro ao processar mensagem", vhost)
         return {
-            "status": "error", 
+            "status": "error",
             "error": str(e)
         }
 
-def callback_factory(vhost, channel):
+async def consume_vhost(vhost, shutdown_event):
     """
-    Cria uma função de callback para um vhost específico
-    
+    Consome a fila de um vhost com aio-pika
+
+    O prefetch mantém várias entregas em voo e cada handler roda fora do
+    event loop, então as latências de LLM das mensagens se sobrepõem —
+    sem o polling de process_data_events + sleep do laço síncrono antigo.
+    O encerramento é dirigido pelo Event compartilhado com o supervisor,
+    também armado pelos sinais recebidos diretamente no filho.
+
     Args:
-        vhost: Virtual host
-        channel: Canal do RabbitMQ
-        
-    Returns:
-        function: Função de callback
+        vhost: Virtual host para consumir
+        shutdown_event: multiprocessing.Event que pede o encerramento
     """
-    def callback(ch, method, properties, body):
-        """Callback para processar mensagens"""
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, shutdown_event.set)
+
+    # Resolver o handler uma única vez: o vhost não muda durante a vida
+    # do consumidor, então o lookup não pertence ao caminho por mensagem
+    handler = _load_handler(vhost)
+    if handler is None:
+        logger.error("Nenhum handler definido para vhost %s", vhost)
+        return
+
+    while not shutdown_event.is_set():
         try:
-            # Processar a mensagem
-            result = process_message(vhost, body, properties)
-            
-            # Confirmar processamento
-            ch.basic_ack(delivery_tag=method.delivery_tag)
-            logger.info(f"[{vhost}] Mensagem confirmada (ACK)")
-            
-            # Salvar resultado (poderia ser em um banco de dados)
-            try:
-                result_json = json.dumps(result, default=json_serializer)
-                logger.info(f"[{vhost}] Resultado salvo (tamanho: {len(result_json)})")
-            except Exception as e:
-                logger.error(f"[{vhost}] Erro ao serializar resultado: {e}")
-            
+            connection = await connect_rabbitmq(vhost)
+            async with connection:
+                channel = await connection.channel()
+                await channel.set_qos(prefetch_count=WORKER_PREFETCH_COUNT)
+
+                # Verificar se a fila existe (não tentar criar ou modificar)
+                queue = await channel.declare_queue(QUEUE_NAME, passive=True)
+                logger.info("[%s] Fila '%s' encontrada", vhost, QUEUE_NAME)
+
+                # Destino dos resultados (exchange provisionado no broker,
+                # como as filas); sem ele, nenhuma serialização acontece
+                results_exchange = None
+                if RESULTS_EXCHANGE:
+                    try:
+                        results_exchange = await channel.get_exchange(RESULTS_EXCHANGE)
+                    except Exception as e:
+                        logger.warning("[%s] Exchange de resultados '%s' indisponível: %s",
+                                       vhost, RESULTS_EXCHANGE, e)
+
+                # Ack em lote por marca d'água: confirmar mensagem a
+                # mensagem custa um frame AMQP por entrega; com
+                # multiple=True um único basic_ack confirma todo o
+                # prefixo contíguo já concluído. Como os handlers
+                # terminam fora de ordem, só avançamos a marca até o
+                # maior tag cujos antecessores também terminaram.
+                # Estado por conexão (os delivery tags reiniciam nela)
+                done = {}            # delivery_tag -> mensagem concluída
+                acked_watermark = 0  # maior tag já confirmado
+                generation = 0       # incrementa a cada reconexão do canal
+
+                def _reset_ack_state(*_):
+                    # A reconexão robusta acontece dentro deste mesmo
+                    # bloco: os delivery tags reiniciam em 1 no canal
+                    # novo, então a marca d'água e as mensagens retidas
+                    # (presas ao canal morto) ficam inválidas. O broker
+                    # reentrega tudo que ficou sem ack. A geração nova
+                    # invalida os handlers ainda em voo da anterior: um
+                    # tag antigo gravado em done depois do reset casaria
+                    # com a numeração nova e o ack cumulativo confirmaria
+                    # mensagens que nem foram processadas
+                    nonlocal acked_watermark, generation
+                    generation += 1
+                    done.clear()
+                    acked_watermark = 0
+
+                connection.reconnect_callbacks.add(_reset_ack_state)
+
+                async def on_message(message: aio_pika.abc.AbstractIncomingMessage):
+                    # Geração da entrega: resultados de gerações anteriores
+                    # são descartados (o broker já reentregou a mensagem)
+                    gen = generation
+                    try:
+                        # Tempo de fila (publicação -> despacho), quando o
+                        # produtor carimba o timestamp da mensagem
+                        if message.timestamp is not None:
+                            espera = time.time() - message.timestamp.timestamp()
+                            logger.info("[%s] Mensagem esperou %.2fs na fila", vhost, espera)
+
+                        # Handler síncrono (CrewAI) fora do event loop
+                        result = await asyncio.to_thread(
+                            process_message, vhost, handler,
+                            message.body, message.properties
+                        )
+                        if gen != generation:
+                            return
+                        # Marcar como concluída; o flusher confirma o lote
+                        done[message.delivery_tag] = message
+
+                        # Persistir o resultado quando há um destino; sem
+                        # exchange configurado a serialização nem acontece
+                        if results_exchange is not None:
+                            try:
+                                await results_exchange.publish(
+                                    aio_pika.Message(
+                                        # datetime/dataclass já saem pelo
+                                        # caminho C do orjson; as opções
+                                        # cobrem numpy e datetimes naïve,
+                                        # deixando o fallback em Python
+                                        # só para tipos realmente exóticos
+                                        body=orjson.dumps(
+                                            result,
+                                            option=orjson.OPT_NAIVE_UTC
+                                            | orjson.OPT_SERIALIZE_NUMPY,
+                                            default=json_serializer
+                                        ),
+                                        delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                                        content_type="application/json"
+                                    ),
+                                    routing_key=f"{vhost}.result"
+                                )
+                            except Exception as e:
+                                logger.error("[%s] Erro ao publicar resultado: %s", vhost, e)
+
+                    except Exception as e:
+                        logger.error("[%s] Erro no callback: %s", vhost, e)
+                        if gen != generation:
+                            return
+                        # Retentativa limitada: requeue incondicional faz uma
+                        # mensagem-veneno pagar kickoff() de LLM para sempre
+                        retries = (message.headers or {}).get("x-retries", 0) or 0
+                        try:
+                            if retries >= WORKER_MAX_RETRIES:
+                                # Esgotou as tentativas: cópia para a DLQ e descarte
+                                await channel.default_exchange.publish(
+                                    aio_pika.Message(
+                                        body=message.body,
+                                        delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                                        content_type="application/json",
+                                        headers={"x-retries": retries}
+                                    ),
+                                    routing_key=f"{QUEUE_NAME}.dlq"
+                                )
+                                if gen == generation:
+                                    done[message.delivery_tag] = message
+                                logger.warning("[%s] Mensagem desviada para a DLQ "
+                                               "após %d tentativas", vhost, retries)
+                            else:
+                                # Reenfileirar com o contador incrementado
+                                await channel.default_exchange.publish(
+                                    aio_pika.Message(
+                                        body=message.body,
+                                        delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                                        content_type="application/json",
+                                        headers={"x-retries": retries + 1}
+                                    ),
+                                    routing_key=QUEUE_NAME
+                                )
+                                if gen == generation:
+                                    done[message.delivery_tag] = message
+                                logger.info("[%s] Mensagem reenfileirada "
+                                            "(tentativa %d)", vhost, retries + 1)
+                        except Exception as nack_e:
+                            logger.error("[%s] Erro ao tratar falha da mensagem: %s", vhost, nack_e)
+                            # A entrega precisa sair da janela de qualquer
+                            # jeito: nack individual (o broker reentrega) e
+                            # um marcador em done para a marca d'água não
+                            # congelar neste tag
+                            try:
+                                await message.nack(requeue=True)
+                            except Exception:
+                                logger.exception("[%s] Erro no nack individual", vhost)
+                            if gen == generation:
+                                done[message.delivery_tag] = None
+
+                async def ack_flusher():
+                    """Confirma a cada 50ms o prefixo contíguo concluído"""
+                    nonlocal acked_watermark
+                    while True:
+                        await asyncio.sleep(0.05)
+                        marca = acked_watermark
+                        while marca + 1 in done:
+                            marca += 1
+                        if marca == acked_watermark:
+                            continue
+                        # Última mensagem do bloco que ainda precisa de
+                        # ack (None marca tags já resolvidos com nack
+                        # individual, que o ack cumulativo pode pular)
+                        cauda = None
+                        for tag in range(acked_watermark + 1, marca + 1):
+                            msg = done.pop(tag, None)
+                            if msg is not None:
+                                cauda = msg
+                        acked_watermark = marca
+                        if cauda is None:
+                            continue
+                        try:
+                            await cauda.ack(multiple=True)
+                        except Exception:
+                            # Um ack falho (ex.: canal invalidado por uma
+                            # reconexão) não pode matar o flusher — sem
+                            # ele o consumidor esgota o prefetch e trava.
+                            # O _reset_ack_state zera o estado e o broker
+                            # reentrega o que ficou sem confirmação
+                            logger.exception("[%s] Erro ao confirmar lote de acks", vhost)
+
+                flusher = asyncio.create_task(ack_flusher())
+                try:
+                    await queue.consume(on_message)
+                    logger.info("[%s] Worker iniciado e aguardando mensagens...", vhost)
+
+                    # Bloquear até o supervisor (ou um sinal local)
+                    # pedir o encerramento; o wait() do Event é
+                    # bloqueante, então roda fora do event loop
+                    await asyncio.to_thread(shutdown_event.wait)
+                finally:
+                    # Entregas ainda não confirmadas voltam à fila quando
+                    # a conexão fecha (entrega pelo menos uma vez)
+                    flusher.cancel()
+
         except Exception as e:
-            logger.error(f"[{vhost}] Erro no callback: {e}")
-            # Rejeitar com possibilidade de retentativa
-            requeue = True
-            try:
-                ch.basic_nack(delivery_tag=method.delivery_tag, requeue=requeue)
-                logger.info(f"[{vhost}] Mensagem rejeitada (requeue={requeue})")
-            except Exception as nack_e:
-                logger.error(f"[{vhost}] Erro ao rejeitar mensagem: {nack_e}")
-    
-    return callback
-
-def worker_process(vhost):
+            logger.exception("[%s] Erro no consumo", vhost)
+            if shutdown_event.is_set():
+                break
+            await asyncio.sleep(5)  # Aguardar antes de tentar reconectar
+
+def worker_process(vhost, shutdown_event):
     """
     Processo worker para consumir mensagens de um vhost
-    
+
     Args:
         vhost: Virtual host para consumir
+        shutdown_event: multiprocessing.Event compartilhado com o supervisor
     """
-    # Configurar handler para sinais
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
-    
-    logger.info(f"[{vhost}] Iniciando worker...")
-    
-    connection = None
-    channel = None
-    
-    # Loop principal
-    while not should_exit:
-        try:
-            # Se não há conexão ou a conexão foi fechada, conectar novamente
-            if connection is None or not connection.is_open:
-                connection = connect_to_rabbitmq(vhost)
-                channel = connection.channel()
-                
-                # Configurar prefetch
-                channel.basic_qos(prefetch_count=1)
-                
-                # Verificar se a fila existe
-                try:
-                    queue_declare_result = channel.queue_declare(
-                        queue=QUEUE_NAME, 
-                        passive=True
-                    )
-                    logger.info(f"[{vhost}] Fila '{QUEUE_NAME}' encontrada. "
-                               f"Mensagens: {queue_declare_result.method.message_count}")
-                except Exception as e:
-                    logger.warning(f"[{vhost}] A fila '{QUEUE_NAME}' não existe ou não é acessível: {e}")
-                    time.sleep(5)
-                    continue
-                
-                # Configurar consumo
-                channel.basic_consume(
-                    queue=QUEUE_NAME,
-                    on_message_callback=callback_factory(vhost, channel),
-                    auto_ack=False
-                )
-                
-                logger.info(f"[{vhost}] Worker iniciado e aguardando mensagens...")
-            
-            # Processar mensagens com timeout para verificar should_exit
-            connection.process_data_events(time_limit=1.0)
-            time.sleep(0.1)  # Pequena pausa para não sobrecarregar CPU
-            
-        except pika.exceptions.AMQPConnectionError as e:
-            logger.error(f"[{vhost}] Erro de conexão AMQP: {e}")
-            if connection and connection.is_open:
-                try:
-                    connection.close()
-                except:
-                    pass
-            connection = None
-            time.sleep(5)  # Aguardar antes de tentar reconectar
-            
-        except Exception as e:
-            logger.error(f"[{vhost}] Erro inesperado: {e}")
-            logger.error(traceback.format_exc())
-            
-            if connection and connection.is_open:
-                try:
-                    connection.close()
-                except:
-                    pass
-            connection = None
-            time.sleep(5)
-    
-    # Cleanup
-    if connection and connection.is_open:
-        try:
-            connection.close()
-        except:
-            pass
-    
-    logger.info(f"[{vhost}] Worker encerrado")
+    logger.info("[%s] Iniciando worker...", vhost)
+
+    asyncio.run(consume_vhost(vhost, shutdown_event))
+
+    logger.info("[%s] Worker encerrado", vhost)
 
 def main():
     """Função principal para iniciar os workers"""
-    global should_exit
-    
+    global _shutdown_event, _exit_pipe_w
+
     # Configurar handler para sinais
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
-    
-    logger.info(f"Iniciando workers para {len(VIRTUAL_HOSTS)} virtual hosts...")
-    
+
+    logger.info("Iniciando workers para %d virtual hosts...", len(VIRTUAL_HOSTS))
+
+    # Contexto forkserver com os handlers pré-carregados: um processo
+    # modelo único paga o import pesado do CrewAI uma vez e os filhos
+    # (inclusive os reiniciados pelo supervisor) nascem dele por fork
+    # barato, compartilhando as páginas de import via COW
+    ctx = multiprocessing.get_context("forkserver")
+    ctx.set_forkserver_preload(
+        [module for module, _ in _HANDLER_MODULES.values()]
+    )
+
+    # Evento de encerramento visível em todos os processos
+    _shutdown_event = ctx.Event()
+
     # Iniciar um processo para cada vhost
     processes = []
     for vhost in VIRTUAL_HOSTS:
-        process = multiprocessing.Process(
+        process = ctx.Process(
             target=worker_process,
-            args=(vhost,),
+            args=(vhost, _shutdown_event),
             name=f"worker-{vhost}"
         )
         process.daemon = True
         processes.append((vhost, process))
         process.start()
-        logger.info(f"Worker para vhost '{vhost}' iniciado (PID: {process.pid})")
-    
-    # Monitorar os processos
+        logger.info("Worker para vhost '%s' iniciado (PID: %s)", vhost, process.pid)
+
+    # Self-pipe para o signal handler acordar o wait() das sentinelas
+    exit_pipe_r, _exit_pipe_w = ctx.Pipe(duplex=False)
+
+    # Monitorar os processos pelas sentinelas: wait() bloqueia em um
+    # único epoll até algum filho morrer (ou o sinal escrever no pipe),
+    # em vez de varrer is_alive() a cada 30s — reinício imediato e zero
+    # CPU do supervisor em regime
+    sentinels = {p.sentinel: (i, vh) for i, (vh, p) in enumerate(processes)}
     try:
-        while not should_exit:
-            for i, (vhost, process) in enumerate(processes):
-                if not process.is_alive():
-                    logger.warning(f"Worker para vhost '{vhost}' morreu. Reiniciando...")
-                    # Reiniciar processo
-                    new_process = multiprocessing.Process(
-                        target=worker_process,
-                        args=(vhost,),
-                        name=f"worker-{vhost}"
-                    )
-                    new_process.daemon = True
-                    processes[i] = (vhost, new_process)
-                    new_process.start()
-                    logger.info(f"Worker para vhost '{vhost}' reiniciado (PID: {new_process.pid})")
-            
-            # Verificar a cada 30 segundos
-            time.sleep(30)
-            
+        while not _shutdown_event.is_set():
+            ready = wait_for_sentinels(list(sentinels) + [exit_pipe_r])
+            if _shutdown_event.is_set():
+                break
+            for sentinel in ready:
+                entry = sentinels.pop(sentinel, None)
+                if entry is None:
+                    continue  # era o self-pipe
+                i, vhost = entry
+                logger.warning("Worker para vhost '%s' morreu. Reiniciando...", vhost)
+                # Reiniciar processo (também a partir do forkserver)
+                new_process = ctx.Process(
+                    target=worker_process,
+                    args=(vhost, _shutdown_event),
+                    name=f"worker-{vhost}"
+                )
+                new_process.daemon = True
+                processes[i] = (vhost, new_process)
+                new_process.start()
+                sentinels[new_process.sentinel] = (i, vhost)
+                logger.info("Worker para vhost '%s' reiniciado (PID: %s)", vhost, new_process.pid)
+
     except KeyboardInterrupt:
         logger.info("Interrupção detectada. Encerrando workers...")
-        should_exit = True
-        
+        _shutdown_event.set()
+
     # Aguardar todos os processos terminarem
     for vhost, process in processes:
         if process.is_alive():
             process.join(timeout=5)
             if process.is_alive():
-                logger.warning(f"Worker para '{vhost}' não encerrou graciosamente. Terminando...")
+                logger.warning("Worker para '%s' não encerrou graciosamente. Terminando...", vhost)
                 process.terminate()
-    
+
     logger.info("Todos os workers foram encerrados")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()